@@ -0,0 +1,151 @@
+"""
+Requests/sec of the structured read API, cold vs conditional (ETag) polling,
+with and without gzip.
+
+    cd backend && python -m bench.bench_api
+    cd backend && python -m bench.bench_api --chat     # also time /chat (stub LLM) for comparison
+
+Starts uvicorn on the bench DB in a subprocess and drives it from
+--clients threads, each with its own keep-alive connection.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+from bench.fixtures import use_bench_db
+from bench.stub_ollama import StubOllama
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend, env=os.environ.copy(), stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def run(base_url: str, requests_, clients: int, seconds: float, conditional: bool, gzip: bool) -> dict:
+    """
+    Each client cycles through `requests_` ((method, path, params, json) tuples) until time runs out.
+    """
+    latencies, sizes, statuses = [], [], {}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client(offset):
+        headers = {"Accept-Encoding": "gzip" if gzip else "identity"}
+        etags = {}
+        local_lat, local_sizes, local_status = [], [], {}
+        with httpx.Client(base_url=base_url, headers=headers, timeout=30) as http:
+            i = offset
+            while time.perf_counter() < stop:
+                method, path, params, body = requests_[i % len(requests_)]
+                i += 1
+                extra = {"If-None-Match": etags[(path, str(params))]} if conditional and (path, str(params)) in etags else {}
+                start = time.perf_counter()
+                r = http.request(method, path, params=params, json=body, headers=extra)
+                local_lat.append((time.perf_counter() - start) * 1000)
+                local_sizes.append(int(r.headers.get("content-length", len(r.content))))
+                local_status[r.status_code] = local_status.get(r.status_code, 0) + 1
+                if "etag" in r.headers:
+                    etags[(path, str(params))] = r.headers["etag"]
+        with lock:
+            latencies.extend(local_lat)
+            sizes.extend(local_sizes)
+            for code, n in local_status.items():
+                statuses[code] = statuses.get(code, 0) + n
+
+    threads = [threading.Thread(target=client, args=(c * 7,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "bytes": statistics.mean(sizes),
+        "statuses": statuses,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--chat", action="store_true", help="Also measure /chat against the stub LLM")
+    args = ap.parse_args()
+
+    info = use_bench_db()
+    stub = StubOllama(speed=4.0).start() if args.chat else None
+    if stub:
+        os.environ["OLLAMA_HOST"] = stub.base_url
+    port = free_port()
+    proc = start_server(port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    users = sorted(info["user_orders"].items())
+    scenarios = {
+        "order": [("GET", f"/orders/{orders[0][0]}", {"user_id": uid}, None) for uid, orders in users],
+        "order?fields": [
+            ("GET", f"/orders/{orders[0][0]}", {"user_id": uid, "fields": "order_id,status,delivery_date"}, None)
+            for uid, orders in users
+        ],
+        "user orders": [("GET", f"/users/{uid}/orders", {"limit": 50}, None) for uid, _ in users],
+        "product": [("GET", f"/products/{p[:-2]}", None, None) for p in info["p_ids"][:50]],
+        "search": [
+            ("GET", "/products/search", {"colour": c, "occasion": o, "limit": 20}, None)
+            for c in ("red", "blue", "black", "pink") for o in ("party", "casual", "work")
+        ],
+    }
+    if args.chat:
+        scenarios["/chat (LLM)"] = [
+            ("POST", "/chat", None, {"user_id": uid, "relevant_data": {},
+                                     "messages": [{"role": "user", "content": f"status of order {orders[0][0]}"}]})
+            for uid, orders in users
+        ]
+
+    print(f"{'scenario':>14} {'mode':>12} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>8}  statuses")
+    try:
+        for name, requests_ in scenarios.items():
+            modes = [("plain", False, False)]
+            if not name.startswith("/chat"):
+                modes += [("gzip", False, True), ("etag poll", True, True)]
+            for label, conditional, gzip in modes:
+                r = run(base_url, requests_, args.clients, args.seconds, conditional, gzip)
+                print(f"{name:>14} {label:>12} {r['rps']:>9.0f} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['bytes']:>8.0f}  {r['statuses']}")
+    finally:
+        proc.terminate()
+        proc.wait()
+        if stub:
+            stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
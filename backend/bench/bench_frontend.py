@@ -0,0 +1,152 @@
+"""
+Streamlit client costs outside the browser: HTTP round trips with bare
+requests.post vs the pooled keep-alive session, and the per-rerun work of
+re-scanning the whole transcript vs parsing only new messages into a window.
+
+    cd backend && python -m bench.bench_frontend
+    cd backend && python -m bench.bench_frontend --turns 40 --history 50 200 1000
+
+"send → ready" is click-to-blocks-ready: POST /chat, append the reply and
+prepare what the page draws. The page itself shows the same interval
+(plus drawing) under the chat after every reply.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+from bench.bench_api import free_port, start_server
+from bench.fixtures import use_bench_db
+from bench.stub_ollama import StubOllama
+
+FRONTEND_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "frontend", "src")
+RENDER_WINDOW = 20  # frontend/src/bot.py
+
+
+def legacy_prepare(messages):
+    """
+    What bot.py did on every rerun: format and regex-scan every message.
+    """
+    import re
+
+    lines = []
+    for msg in messages:
+        if msg["role"] == "user":
+            lines.append(f"🧑 **You:** {msg['content']}")
+        elif msg["role"] == "viewer_agent" and "http" in msg["content"]:
+            img_urls = [f"{url}?size=thumb" for url in re.findall(r"http[s]?://\S+/images/[\w.]+", msg["content"])]
+            img_urls += re.findall(r"http[s]?://\S+\.(?:jpg|jpeg|png)", msg["content"])
+            lines.append(f"🤖 **Bot:** {msg['content']}")
+            lines.extend(img_urls)
+        else:
+            lines.append(f"🤖 **Bot:** {msg['content']}")
+    return lines
+
+
+def windowed_prepare(messages, blocks):
+    from client import parse_new
+
+    return parse_new(messages, blocks)[-RENDER_WINDOW:]
+
+
+def transcript(n):
+    messages = []
+    for i in range(n // 2):
+        messages.append({"role": "user", "content": f"what is the status of order {i}"})
+        reply = f"Here is the image: {os.environ['FASHION_API_URL']}/images/{1000 + i}" if i % 5 == 0 else \
+            "Your order is currently shipped and should arrive on 2025-01-14."
+        messages.append({"role": "viewer_agent", "content": reply})
+    return messages
+
+
+def time_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench_http(base_url, user_id, order_id, turns):
+    import client
+
+    login = {"username_or_email": "user1", "password": "x"}
+    rows = []
+    for label, send in (
+        ("requests.post", lambda path, body: requests.post(f"{base_url}{path}", json=body)),
+        ("pooled session", lambda path, body: client.post(path, body)),
+    ):
+        login_ms = []
+        for _ in range(turns):
+            start = time.perf_counter()
+            send("/login", login)
+            login_ms.append((time.perf_counter() - start) * 1000)
+
+        messages, blocks, relevant_data, turn_ms = [], [], {}, []
+        for i in range(turns):
+            start = time.perf_counter()
+            text = f"what is the status of order {order_id}" if i % 3 == 0 else "when will it be delivered?"
+            messages.append({"role": "user", "content": text})
+            data = send("/chat", {"messages": messages[-12:], "user_id": user_id, "relevant_data": relevant_data}).json()
+            messages.extend(data["messages"])
+            relevant_data = data["relevant_data"]
+            if label == "requests.post":
+                legacy_prepare(messages)
+            else:
+                windowed_prepare(messages, blocks)
+            turn_ms.append((time.perf_counter() - start) * 1000)
+        rows.append((label, statistics.median(login_ms), statistics.median(turn_ms)))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=20)
+    ap.add_argument("--history", type=int, nargs="+", default=[50, 200, 1000, 5000])
+    ap.add_argument("--speed", type=float, default=50.0, help="Stub speed-up factor")
+    args = ap.parse_args()
+
+    # The frontend client reads its backend URL at import
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    os.environ["FASHION_API_URL"] = base_url
+    sys.path.insert(0, FRONTEND_SRC)
+
+    print(f"per rerun, after one new exchange (window {RENDER_WINDOW})")
+    print(f"{'messages':>8} {'full re-scan ms':>15} {'drawn':>6} {'incremental ms':>14} {'drawn':>6}")
+    for n in args.history:
+        messages = transcript(n)
+        blocks = []
+        windowed_prepare(messages[:-2], blocks)
+        full = legacy_prepare(messages)
+        incremental = windowed_prepare(messages, blocks)
+        full_ms = time_ms(lambda: legacy_prepare(messages), 20)
+
+        def rerun():
+            # Each rerun sees two new messages; the rest are already parsed
+            del blocks[-2:]
+            windowed_prepare(messages, blocks)
+
+        inc_ms = time_ms(rerun, 20)
+        print(f"{n:>8} {full_ms:>15.3f} {len(full):>6} {inc_ms:>14.3f} {len(incremental):>6}")
+
+    info = use_bench_db()
+    stub = StubOllama(speed=args.speed).start()
+    os.environ["OLLAMA_HOST"] = stub.base_url
+    proc = start_server(port)
+    user_id, orders = max(info["user_orders"].items(), key=lambda kv: len(kv[1]))
+    try:
+        print(f"\nmedian over {args.turns} calls")
+        print(f"{'client':>15} {'/login ms':>10} {'send → ready ms':>16}")
+        for label, login_ms, turn_ms in bench_http(base_url, user_id, orders[0][0], args.turns):
+            print(f"{label:>15} {login_ms:>10.2f} {turn_ms:>16.1f}")
+    finally:
+        proc.terminate()
+        proc.wait()
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Image proxy cache against the local stub origin.
+
+    cd backend && python -m bench.bench_images
+
+Reports origin fetches, cold vs warm latency per variant and LRU eviction
+under a small size cap.
+"""
+import argparse
+import tempfile
+import time
+
+from bench.stub_image_server import StubImageServer
+from src.services import metrics
+from src.services.image_cache import ImageCache
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(products: int, reruns: int, cap_kb: int):
+    origin = StubImageServer().start()
+    urls = [f"{origin.base_url}/img/{i}.jpg" for i in range(products)]
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = ImageCache(root=root, max_bytes=cap_kb * 1024)
+
+        for variant in ("original", "thumb"):
+            cold = [timed(lambda u=u: cache.get(u, variant))[1] for u in urls]
+            # Every Streamlit rerun used to re-download each image in history
+            warm = [timed(lambda u=u: cache.get(u, variant))[1] for _ in range(reruns) for u in urls]
+            print(f"{variant:>8}: cold {sum(cold) / len(cold):7.2f} ms  warm {sum(warm) / len(warm):6.3f} ms")
+
+        lookups = products * (reruns + 1) * 2
+        print(f"origin fetches: {origin.hits} for {lookups} lookups, evictions: {metrics.get('images.evicted'):.0f}")
+        print(f"cache size: {cache.size_bytes() / 1024:.0f} KB (cap {cap_kb} KB)")
+
+    origin.shutdown()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--products", type=int, default=20)
+    ap.add_argument("--reruns", type=int, default=10)
+    ap.add_argument("--cap-kb", type=int, default=1024)
+    args = ap.parse_args()
+    main(args.products, args.reruns, args.cap_kb)
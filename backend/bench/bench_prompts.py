@@ -0,0 +1,209 @@
+"""
+Prompt evaluation per call: variable-first prompts vs static-prefix prompts.
+
+    cd backend && python -m bench.bench_prompts            # against bench/stub_ollama
+    cd backend && python -m bench.bench_prompts --ollama http://127.0.0.1:11434
+
+Several conversations are interleaved (router call + viewer call per turn),
+the way concurrent sessions hit one Ollama server. "before" sends the old
+single-string prompts, which open with the conversation / user message, so
+no two calls share more than a few tokens. "after" sends the registry
+prompts (static system message first). "after, keep_alive=0" unloads the
+model after every call, which is what happens with any prompt layout once
+the server's keep_alive expires between turns.
+
+Prompt tokens and eval times come from Ollama's response metadata
+(prompt_eval_count counts only the tokens not served from the cache).
+"""
+import argparse
+import contextlib
+import io
+import sqlite3
+
+from bench.fixtures import use_bench_db
+from bench.stub_ollama import StubOllama, _tokens
+
+CONVERSATION = [
+    "what is the status of order {order_id}",
+    "when will it be delivered?",
+    "how much did I pay for it?",
+    "when does it ship?",
+    "what was the price?",
+]
+
+
+# The prompts as they were built before the registry (verbatim layout)
+def legacy_router_prompt(messages, user_input):
+    from src.agents.prompts import RELEVANT_DATA_FORMAT
+
+    return f"""
+    Conversation so far:
+    {messages[-4:]}
+
+    User said: "{user_input}"
+
+    Step 1: Determine intent
+    - "details" if asking for product/order info shipping details product image etc or any information to be extracted from sql
+    - "order_summary" if asking about all their orders together: money spent, how many orders, orders in transit, last order
+    - "billing" if asking to buy or payment after recommendation
+    - "recommendation" if asking for similar products or suggestions
+    - "none" otherwise
+
+    Step 2: You are a structured information extractor.
+    The user might mention order IDs, product IDs, or describe products.
+    Return relevant data as JSON following this schema:
+    {RELEVANT_DATA_FORMAT}
+
+    Examples:
+    - "what is my order 12" → {{ "order_id": "12" }}
+    - "show product id 1020" → {{ "product_id": "1020" }}
+    - "find blue kurta by W" → {{ "colour": "blue", "brand": "W" }}
+    - "for order of id 9" → {{ "order_id": "9" }}
+
+    Message: "{user_input}"
+
+    Example output:
+    {{
+      "intent": "details",
+      "relevant_data": {{
+          "order_id": "1234",
+          "product_id": null,
+          "description": "red printed kurta"
+      }}
+    }}
+    """
+
+
+def legacy_viewer_prompt(view, user_input):
+    relevant_data_text = "\n".join([f"{k}: {v}" for k, v in view.items()])
+    return f"""
+    The user asked: "{user_input}"
+
+    Full Available Context (Use ONLY this information to construct your response):
+    {relevant_data_text}
+
+    Task: Respond concisely and naturally based ONLY on the user's latest query.
+
+    RULES:
+    1. **Conciseness:** Provide the specific requested value (e.g., status, date, price) in one or two short, natural sentences.
+    2. **Anti-Hallucination:** DO NOT mention any fields that the user did not ask for. DO NOT state that data is unavailable if it is present in the context above.
+    3. **Focus:** If the user asks for 'status', give the status. If they ask for 'delivery date', give the delivery date.
+
+    Example:
+    User: "what is the order status"
+    Response: "Your order is currently {view.get('status')}."
+
+    Example:
+    User: "what is the delivery date"
+    Response: "The estimated delivery date is {view.get('delivery_date')}."
+    """
+
+
+def registry_router_prompt(messages, user_input):
+    from src.agents import prompts
+    from src.agents.prompts import format_conversation
+
+    return prompts.render("router", conversation=format_conversation(messages), user_input=user_input)
+
+
+def registry_viewer_prompt(view, user_input):
+    from src.agents import prompts
+    from src.agents.prompts import format_record
+
+    return prompts.render("viewer", context=format_record(view), user_input=user_input)
+
+
+VARIANTS = [
+    ("before", legacy_router_prompt, legacy_viewer_prompt, None),
+    ("after", registry_router_prompt, registry_viewer_prompt, None),
+    ("after, keep_alive=0", registry_router_prompt, registry_viewer_prompt, 0),
+]
+
+
+def prompt_tokens(prompt) -> int:
+    # As the server sees it: message contents joined by the chat template
+    return len(_tokens(prompt if isinstance(prompt, str) else "\n".join(m.content for m in prompt)))
+
+
+def load_views(db_path, users):
+    from src.agents.sql_node import fetch_order
+    from src.agents.state import record_from_row, record_view
+
+    conn = sqlite3.connect(db_path)
+    views = {}
+    try:
+        for user_id, orders in users:
+            order_id, _ = orders[0]
+            views[user_id] = record_view(record_from_row(fetch_order(conn.cursor(), order_id, user_id)))
+    finally:
+        conn.close()
+    return views
+
+
+def run_variant(base_url, users, views, turns, router_prompt, viewer_prompt, keep_alive):
+    from src.services import llm, metrics
+
+    model = llm.chat_model(base_url=base_url) if keep_alive is None else \
+        llm.chat_model(base_url=base_url, keep_alive=keep_alive)
+    metrics.reset()
+    transcripts = {user_id: [] for user_id, _ in users}
+    total_tokens = 0
+    for turn in range(turns):
+        # Round-robin: every session's turn lands between the other sessions' turns
+        for user_id, orders in users:
+            order_id, _ = orders[0]
+            text = CONVERSATION[turn % len(CONVERSATION)].format(order_id=order_id)
+            messages = transcripts[user_id]
+            view = views[user_id]
+            for name, prompt in (("router", router_prompt(messages, text)), ("viewer", viewer_prompt(view, text))):
+                response = llm.invoke(model, prompt, name=name)
+                total_tokens += prompt_tokens(prompt)
+                if name == "viewer":
+                    messages += [{"role": "user", "content": text}, {"role": "viewer_agent", "content": response.content}]
+    stats = metrics.snapshot("llm.")
+    calls = sum(stats.get(f"llm.{n}.prompt_calls", 0) for n in ("router", "viewer"))
+    evaluated = sum(stats.get(f"llm.{n}.prompt_tokens", 0) for n in ("router", "viewer"))
+    eval_ms = sum(stats.get(f"llm.{n}.prompt_eval_ms", 0) for n in ("router", "viewer"))
+    return {"calls": calls, "prompt_tokens": total_tokens, "evaluated": evaluated, "eval_ms": eval_ms}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ollama", help="Real Ollama base URL (default: start bench/stub_ollama)")
+    ap.add_argument("--sessions", type=int, default=4, help="Interleaved conversations")
+    ap.add_argument("--turns", type=int, default=5)
+    ap.add_argument("--slots", type=int, default=4, help="Stub parallel slots (OLLAMA_NUM_PARALLEL)")
+    ap.add_argument("--speed", type=float, default=20.0, help="Stub speed-up factor")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    info = use_bench_db(orders=2000)
+    users = sorted(info["user_orders"].items(), key=lambda kv: -len(kv[1]))[:args.sessions]
+    views = load_views(info["path"], users)
+
+    from src.agents.prompts import PROMPTS
+
+    print("prompt    prefix         static tokens")
+    for prompt in PROMPTS.values():
+        print(f"{prompt.name:<9} {prompt.prefix_hash}  {len(_tokens(prompt.system)):>13}")
+
+    # Real Ollama reports real durations; the stub's are divided by --speed
+    scale = 1.0 if args.ollama else args.speed
+    print(f"\n{len(users)} sessions × {args.turns} turns, router + viewer per turn")
+    print(f"{'variant':<22} {'calls':>5} {'prompt tok':>10} {'evaluated':>9} {'cached':>7} {'eval ms/call':>12}")
+    for label, router_prompt, viewer_prompt, keep_alive in VARIANTS:
+        # Fresh server per variant so no cache carries over
+        stub = None if args.ollama else StubOllama(speed=args.speed, slots=args.slots).start()
+        base_url = args.ollama or stub.base_url
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            r = run_variant(base_url, users, views, args.turns, router_prompt, viewer_prompt, keep_alive)
+        if stub:
+            stub.shutdown()
+        calls = r["calls"] or 1
+        cached = 1 - r["evaluated"] / r["prompt_tokens"] if r["prompt_tokens"] else 0
+        print(f"{label:<22} {r['calls']:>5.0f} {r['prompt_tokens'] / calls:>10.0f} {r['evaluated'] / calls:>9.0f} "
+              f"{cached:>6.0%} {r['eval_ms'] * scale / calls:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Router parse-failure rate and wasted tokens, before vs after structured output.
+
+    cd backend && python -m bench.bench_router
+
+Runs the same messages through
+  legacy:     free-text generation, no length cap, json.loads on the full reply
+              (what router_node did before structured output)
+  structured: router_node as shipped (JSON-schema format, token cap, streaming
+              extractor that stops at the closing brace)
+against bench/stub_ollama in --messy mode.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+from bench.stub_ollama import StubOllama, messy_reply
+
+MESSAGES = [
+    "what is the status of order 12",
+    "show product id 1020",
+    "when will order 7 be delivered?",
+    "find a blue cotton kurta for a party",
+    "how much did I pay for order 31",
+    "hi there",
+    "what's the shipping date for my order 44",
+    "show me the image of product 3377",
+]
+
+
+def run_legacy(model, prompts):
+    from src.services import llm
+
+    fails, tokens, wasted, latencies = 0, 0, 0, []
+    for prompt in prompts:
+        start = time.perf_counter()
+        response = llm.invoke(model, prompt)
+        latencies.append((time.perf_counter() - start) * 1000)
+        n = response.response_metadata.get("eval_count", 0)
+        tokens += n
+        try:
+            json.loads(response.content)
+        except json.JSONDecodeError:
+            fails += 1
+            wasted += n
+    return fails, tokens, wasted, latencies
+
+
+def run_structured(states):
+    from src.agents.router_node import router_node
+    from src.services import metrics
+
+    before = {k: metrics.get(f"llm.router.{k}") for k in ("parse_fail", "tokens", "wasted_tokens")}
+    latencies = []
+    for state in states:
+        start = time.perf_counter()
+        router_node(dict(state))
+        latencies.append((time.perf_counter() - start) * 1000)
+    after = {k: metrics.get(f"llm.router.{k}") - v for k, v in before.items()}
+    return int(after["parse_fail"]), int(after["tokens"]), int(after["wasted_tokens"]), latencies
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--speed", type=float, default=10.0, help="Stub speed-up factor")
+    args = ap.parse_args()
+
+    stub = StubOllama(speed=args.speed, reply=messy_reply).start()
+    os.environ["OLLAMA_HOST"] = stub.base_url
+
+    from src.agents.router_node import build_routing_prompt, ollama_model
+
+    messages = MESSAGES * args.rounds
+    # Distinct conversation prefix per call so nothing is coalesced
+    states = [
+        {"messages": [{"role": "user", "content": f"turn {i}"}], "latest_input": m, "relevant_data": {}, "user_id": 1}
+        for i, m in enumerate(messages)
+    ]
+    prompts = [build_routing_prompt(s["messages"], s["latest_input"]) for s in states]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = {
+            "legacy": run_legacy(ollama_model, prompts),
+            "structured": run_structured(states),
+        }
+
+    print(f"{'path':>11} {'calls':>6} {'parse fail':>11} {'tokens':>8} {'wasted':>8} {'mean ms':>9}")
+    for name, (fails, tokens, wasted, latencies) in results.items():
+        calls = len(latencies)
+        print(f"{name:>11} {calls:>6} {fails / calls:>10.0%} {tokens:>8} {wasted:>8} {sum(latencies) / calls:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Per-session memory and /chat payload bytes: full-echo state vs compact state.
+
+    cd backend && python -m bench.bench_state
+    cd backend && python -m bench.bench_state --turns 80
+
+A long conversation runs through the workflow the way /chat drives it
+(trim_messages / compact_relevant_data in, to_client out). Next to it, the
+full-echo protocol is reconstructed from the same turns: the whole transcript
+plus relevant_data with every fetched column (DESCRIPTION included) sent both
+ways. Also compares one user's order working set held as dict rows vs
+slotted OrderRecords.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+from dataclasses import fields, is_dataclass
+
+from bench.fixtures import use_bench_db
+from bench.stub_ollama import StubOllama
+
+CONVERSATION = [
+    "what is the status of order {order_id}",
+    "when will it be delivered?",
+    "how much did I pay for it?",
+    "show me the image",
+    "what is the price of product {product_id}",
+    "how much have I spent this month?",
+]
+CHECKPOINTS = (1, 5, 10, 20, 40, 80, 160)
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    """
+    sys.getsizeof over the whole object graph (dicts, sequences, slotted records).
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    elif is_dataclass(obj):
+        size += sum(deep_sizeof(getattr(obj, f.name), seen) for f in fields(obj))
+    return size
+
+
+def nbytes(payload) -> int:
+    return len(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def full_row(cursor, relevant_data, user_id) -> dict:
+    """
+    What viewer_node used to merge into relevant_data: every column of the row.
+    """
+    from src.agents.sql_node import fetch_order, fetch_product
+
+    row = None
+    if relevant_data.get("order_id"):
+        row = fetch_order(cursor, relevant_data["order_id"], user_id)
+    elif relevant_data.get("product_id"):
+        row = fetch_product(cursor, relevant_data["product_id"])
+    if not row:
+        return {}
+    row.pop("version", None)
+    row.pop("product_version", None)
+    return {"type": "order" if "status" in row else "product", **row}
+
+
+def run_conversation(graph, user_id, orders, turns, db_path):
+    from src.agents.state import compact_relevant_data, trim_messages, to_client
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    transcript, relevant_data = [], {}
+    legacy_relevant_data = {}
+    rows = []
+    for turn in range(1, turns + 1):
+        order_id, product_id = orders[(turn - 1) // len(CONVERSATION) % len(orders)]
+        text = CONVERSATION[(turn - 1) % len(CONVERSATION)].format(order_id=order_id, product_id=product_id.split(".")[0])
+        transcript.append({"role": "user", "content": text})
+
+        # Compact protocol (what /chat does now)
+        request = {"messages": transcript[-12:], "user_id": user_id, "relevant_data": relevant_data}
+        state = {
+            "messages": trim_messages(request["messages"]), "user_id": user_id,
+            "relevant_data": compact_relevant_data(relevant_data), "latest_input": text, "deadline": None,
+        }
+        sent = len(state["messages"])
+        result = graph.invoke(state)
+        reply = to_client(result, sent)
+        transcript.extend(reply["messages"])
+        relevant_data = reply["relevant_data"]
+
+        # Full-echo protocol over the same turn
+        legacy_request = {"messages": transcript[:-len(reply["messages"]) or None], "user_id": user_id,
+                          "relevant_data": legacy_relevant_data}
+        legacy_relevant_data = {**legacy_relevant_data, **relevant_data, **full_row(cursor, relevant_data, user_id)}
+        legacy_response = {"messages": transcript, "relevant_data": legacy_relevant_data}
+        legacy_state = {**state, "messages": list(transcript), "relevant_data": legacy_relevant_data}
+
+        if turn in CHECKPOINTS or turn == turns:
+            rows.append({
+                "turn": turn,
+                "req": (nbytes(legacy_request), nbytes(request)),
+                "resp": (nbytes(legacy_response), nbytes(reply)),
+                "state": (deep_sizeof(legacy_state), deep_sizeof({k: v for k, v in result.items() if k != "deadline"})),
+            })
+    conn.close()
+    return rows
+
+
+def working_set_sizes(user_id, db_path):
+    from src.agents.sql_node import fetch_user_orders
+    from src.agents.state import record_from_row
+    from src.services.order_cache import RECENT_ORDERS_LIMIT
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = fetch_user_orders(conn.cursor(), user_id, limit=RECENT_ORDERS_LIMIT)
+    finally:
+        conn.close()
+    as_dicts = {str(r["order_id"]): r for r in rows}
+    as_records = {str(r["order_id"]): record_from_row(r) for r in rows}
+    return len(rows), deep_sizeof(as_dicts), deep_sizeof(as_records)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=40)
+    ap.add_argument("--speed", type=float, default=50.0, help="Stub speed-up factor")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    info = use_bench_db(orders=2000)
+    os.environ["OLLAMA_HOST"] = StubOllama(speed=args.speed).start().base_url
+
+    from src.agents.workflow import build_workflow
+
+    user_id, orders = max(info["user_orders"].items(), key=lambda kv: len(kv[1]))
+    with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+        graph = build_workflow("two_call")
+        rows = run_conversation(graph, user_id, orders, args.turns, info["path"])
+
+    print("bytes per turn: full echo → compact")
+    print(f"{'turn':>5} {'request':>19} {'response':>19} {'state in memory':>21}")
+    for r in rows:
+        cells = [f"{a:>8} → {b:<8}" for a, b in (r["req"], r["resp"], r["state"])]
+        print(f"{r['turn']:>5} {cells[0]:>19} {cells[1]:>19} {cells[2]:>21}")
+
+    n, dict_bytes, record_bytes = working_set_sizes(user_id, info["path"])
+    print(f"\norder working set, one session ({n} orders): dict rows {dict_bytes / 1024:.1f} KB "
+          f"→ slotted records {record_bytes / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Turn latency of the two-call graph vs the fused route-and-answer mode.
+
+    cd backend && python -m bench.bench_workflow            # against bench/stub_ollama
+    cd backend && python -m bench.bench_workflow --ollama http://127.0.0.1:11434
+
+Each conversation asks about one of the user's orders and follows up, the
+way the Streamlit client does (messages + relevant_data sent back each turn).
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import time
+
+from bench.fixtures import use_bench_db
+from bench.stub_ollama import StubOllama
+
+CONVERSATION = [
+    "what is the status of order {order_id}",
+    "when will it be delivered?",
+    "how much did I pay for it?",
+    "when does it ship?",
+    "what is the price of product {product_id}",
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_mode(mode: str, conversations: list) -> dict:
+    from src.agents.workflow import build_workflow
+    from src.services import metrics
+
+    graph = build_workflow(mode)
+    latencies = []
+    llm_before = metrics.get("singleflight.llm.executed")
+
+    for user_id, order_id, product_id in conversations:
+        messages, relevant_data = [], {}
+        for template in CONVERSATION:
+            text = template.format(order_id=order_id, product_id=product_id.split(".")[0])
+            messages.append({"role": "user", "content": text})
+            state = {"messages": messages, "user_id": user_id, "relevant_data": relevant_data, "latest_input": text}
+            start = time.perf_counter()
+            result = graph.invoke(state)
+            latencies.append((time.perf_counter() - start) * 1000)
+            messages, relevant_data = result["messages"], result.get("relevant_data", {})
+
+    turns = len(latencies)
+    return {
+        "mode": mode,
+        "turns": turns,
+        "mean": statistics.mean(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "llm_calls_per_turn": (metrics.get("singleflight.llm.executed") - llm_before) / turns,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--conversations", type=int, default=10)
+    ap.add_argument("--ollama", help="Real Ollama base URL (default: start the stub)")
+    ap.add_argument("--speed", type=float, default=4.0, help="Stub speed-up factor")
+    ap.add_argument("--modes", nargs="+", default=["two_call", "fused"])
+    ap.add_argument("--verbose", action="store_true", help="Show node logging")
+    args = ap.parse_args()
+
+    info = use_bench_db()
+    if args.ollama:
+        os.environ["OLLAMA_HOST"] = args.ollama
+    else:
+        os.environ["OLLAMA_HOST"] = StubOllama(speed=args.speed).start().base_url
+
+    conversations = []
+    for user_id, orders in sorted(info["user_orders"].items())[: args.conversations]:
+        order_id, product_id = orders[0]
+        conversations.append((user_id, order_id, product_id))
+
+    results = []
+    for mode in args.modes:
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            results.append(run_mode(mode, conversations))
+
+    print(f"{'mode':>10} {'turns':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'LLM calls/turn':>15}")
+    for r in results:
+        print(f"{r['mode']:>10} {r['turns']:>6} {r['mean']:>9.1f} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['llm_calls_per_turn']:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Synthetic database for the benchmarks (same schema as db/schema.sql).
+
+Benchmarks call `use_bench_db()` before importing anything from `src`, so
+every module reads the throwaway DB through FASHION_DB_PATH.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "schema.sql")
+STATUSES = ["ordered", "packed", "shipped", "out for delivery", "delivered"]
+COLOURS = ["red", "blue", "navy blue", "green", "black", "white", "pink", "yellow"]
+OCCASIONS = ["casual", "festive", "party", "work"]
+SLEEVES = ["short sleeves", "long sleeves", "three-quarter sleeves", "sleeveless"]
+FABRICS = ["cotton", "silk", "rayon", "polyester", "linen"]
+
+
+def seed_bench_db(path: str, users: int = 20, products: int = 2000, orders: int = 400, seed: int = 7) -> dict:
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+
+    conn.executemany(
+        "INSERT INTO USERS (USERNAME, EMAIL, PASSWORD) VALUES (?, ?, ?)",
+        [(f"user{i}", f"user{i}@example.com", "x") for i in range(1, users + 1)],
+    )
+    p_ids = [f"{10000000 + i}.0" for i in range(products)]
+    conn.executemany(
+        """INSERT INTO PRODUCTS (P_ID, NAME, PRICE, COLOUR, BRAND, IMG, RATINGCOUNT, AVG_RATING, DESCRIPTION,
+                                 TOP_TYPE, SLEEVE_LENGTH, OCCASION, PRINT_PATTERN, FABRIC, HAS_DUPATTA, IS_SUSTAINABLE)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [
+            (
+                p_id, f"Product {p_id[:-2]}", rnd.randint(300, 6000), rnd.choice(COLOURS), f"Brand{rnd.randint(1, 150)}",
+                f"http://127.0.0.1:9/img/{p_id}.jpg", rnd.randint(0, 5000), round(rnd.uniform(1, 5), 1),
+                "Soft fabric, regular fit, machine wash. " * 8,
+                rnd.choice(["kurta", "top", "dress"]), rnd.choice(SLEEVES), rnd.choice(OCCASIONS),
+                rnd.choice(["solid", "printed", "striped"]), rnd.choice(FABRICS), rnd.randint(0, 1), rnd.randint(0, 1),
+            )
+            for p_id in p_ids
+        ],
+    )
+    today = date.today()
+    rows = []
+    for _ in range(orders):
+        ordered = today - timedelta(days=rnd.randint(1, 90))
+        shipped = ordered + timedelta(days=rnd.randint(1, 3))
+        rows.append((
+            rnd.choice(p_ids), rnd.randint(1, users), "", ordered.isoformat(), shipped.isoformat(),
+            (shipped + timedelta(days=rnd.randint(2, 7))).isoformat(), rnd.randint(500, 5000), rnd.choice(STATUSES),
+            str(rnd.randint(1000000000, 9999999999)),
+        ))
+    conn.executemany(
+        """INSERT INTO ORDERS (PRODUCT_ID, USER_ID, PRODUCT_DESCRIPTION, ORDER_DATE, SHIPPING_DATE, DELIVERY_DATE,
+                               AMOUNT, STATUS, DELIVERY_PARTNER_NO) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+    conn.commit()
+
+    user_orders = {}
+    for order_id, user_id, product_id in conn.execute("SELECT ORDER_ID, USER_ID, PRODUCT_ID FROM ORDERS"):
+        user_orders.setdefault(user_id, []).append((order_id, product_id))
+    conn.close()
+    return {"path": path, "user_orders": user_orders, "p_ids": p_ids}
+
+
+def use_bench_db(**kwargs) -> dict:
+    """
+    Create a temporary bench DB and point FASHION_DB_PATH at it.
+    """
+    root = tempfile.mkdtemp(prefix="fashion_bench_")
+    info = seed_bench_db(os.path.join(root, "fashion_ai.db"), **kwargs)
+    os.environ["FASHION_DB_PATH"] = info["path"]
+    os.environ.setdefault("IMAGE_CACHE_DIR", os.path.join(root, "image_cache"))
+    return info
@@ -0,0 +1,122 @@
+"""
+Replay captured /chat traffic through the workflow and diff it against the log.
+
+Capture (opt-in) on the server:
+    CAPTURE_PATH=data/capture.jsonl.gz uvicorn src.main:app
+
+Replay on any build:
+    cd backend && python -m bench.replay data/capture.jsonl.gz                 # LLM + SQL served from the log
+    cd backend && python -m bench.replay data/capture.jsonl.gz --llm live      # real model, recorded data
+    cd backend && python -m bench.replay data/capture.jsonl.gz --sql live --user-id 34
+
+Reports per-turn latency deltas and every turn whose node path, intent or
+answer differs from what was recorded.
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import time
+
+
+def recorded_summary(record):
+    events = record["events"]
+    request = next(e for e in events if e["k"] == "request")
+    response = next((e for e in events if e["k"] == "response"), {})
+    return {
+        "request": request,
+        "path": [e["n"] for e in events if e["k"] == "enter"],
+        "intent": response.get("intent"),
+        "answer": [m.get("content") for m in response.get("new_messages", [])],
+        "ms": response.get("t"),
+    }
+
+
+def replay_turn(graph, record, kinds, user_id, capture, budget):
+    recorded = recorded_summary(record)
+    request = recorded["request"]
+    state = {
+        "messages": list(request["messages"]),
+        "relevant_data": dict(request["relevant_data"]),
+        "latest_input": request["latest_input"],
+        "user_id": user_id if user_id is not None else request["user"],
+        "deadline": budget.start(request.get("budget_ms")),
+    }
+
+    source = capture.ReplaySource(record["events"], kinds=kinds)
+    with capture.turn(path=None) as turn, capture.replaying(source):
+        start = time.perf_counter()
+        try:
+            result = graph.invoke(state)
+        except Exception as e:
+            # A miss falls through to the live backend; keep going if that is down
+            result = {"messages": state["messages"], "intent": f"error: {type(e).__name__}"}
+        ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "id": record["id"],
+        "input": request["latest_input"],
+        "recorded": recorded,
+        "path": [e["n"] for e in turn.events if e["k"] == "enter"],
+        "intent": result.get("intent"),
+        "answer": [m.get("content") for m in result["messages"][len(request["messages"]):]],
+        "ms": ms,
+        "misses": source.misses,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("log", help="Capture log written with CAPTURE_PATH")
+    ap.add_argument("--llm", choices=["recorded", "live"], default="recorded")
+    ap.add_argument("--sql", choices=["recorded", "live"], default="recorded")
+    ap.add_argument("--mode", help="Workflow mode to replay with (default: the recorded one)")
+    ap.add_argument("--user-id", type=int, help="Real user id for --sql live (logs hold anonymized ids)")
+    ap.add_argument("--json", help="Write per-turn results here")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args()
+
+    from src.agents.workflow import build_workflow
+    from src.services import budget, capture
+
+    kinds = ([] if args.llm == "live" else ["llm"]) + ([] if args.sql == "live" else ["sql", "orders"])
+    records = capture.read(args.log)
+    graphs = {}
+    results = []
+    for record in records:
+        mode = args.mode or recorded_summary(record)["request"].get("mode", "two_call")
+        graph = graphs.setdefault(mode, build_workflow(mode))
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            results.append(replay_turn(graph, record, kinds, args.user_id, capture, budget))
+
+    deltas = []
+    diffs = 0
+    for r in results:
+        rec = r["recorded"]
+        delta = r["ms"] - rec["ms"] if rec["ms"] is not None else None
+        if delta is not None:
+            deltas.append(delta)
+        changes = [name for name, a, b in (("path", r["path"], rec["path"]),
+                                           ("intent", r["intent"], rec["intent"]),
+                                           ("answer", r["answer"], rec["answer"])) if a != b]
+        diffs += bool(changes)
+        flag = f"  ≠ {', '.join(changes)}" if changes else ""
+        print(f"{r['id']}  {rec['ms'] or 0:8.1f} → {r['ms']:8.1f} ms  {' > '.join(r['path']):<28}{flag}  {r['input'][:40]!r}")
+        if "path" in changes:
+            print(f"{'':18}recorded path: {' > '.join(rec['path'])}")
+
+    print()
+    print(f"turns: {len(results)}  llm: {args.llm}  sql: {args.sql}  replay misses: {sum(r['misses'] for r in results)}")
+    if deltas:
+        print(f"latency delta: mean {statistics.mean(deltas):+.1f} ms  median {statistics.median(deltas):+.1f} ms  "
+              f"max {max(deltas):+.1f} ms")
+    print(f"turns with routing/answer differences: {diffs}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Local stand-in for the product image CDN.
+
+Serves a generated JPEG for any path and counts requests, so the image proxy
+can be exercised without touching the real origin:
+
+    python -m bench.stub_image_server --port 9100
+    # point PRODUCTS.IMG at http://127.0.0.1:9100/<anything>.jpg
+"""
+import argparse
+import io
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+
+def render_jpeg(path: str, size: int = 1200) -> bytes:
+    # Colour derived from the path so different products give different bytes
+    seed = zlib.crc32(path.encode("utf-8"))
+    colour = (seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF)
+    out = io.BytesIO()
+    Image.new("RGB", (size, size), colour).save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+class StubImageServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubImageServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server._lock:
+            self.server.hits += 1
+        body = render_jpeg(self.path)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=9100)
+    args = ap.parse_args()
+    server = StubImageServer(args.port)
+    print(f"🖼️ Stub image server on {server.base_url}")
+    server.serve_forever()
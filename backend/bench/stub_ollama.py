@@ -0,0 +1,290 @@
+"""
+Stand-in for the Ollama server (POST /api/chat) with a simple latency model.
+
+It recognises the router / fused / viewer prompts and returns plausible
+answers, charging prompt-eval time per input token and decode time per
+output token, so workflow variants can be compared without a GPU. Like
+Ollama, it keeps the last prompt of each of `slots` parallel slots and only
+evaluates tokens past the longest cached prefix, until the model is unloaded
+after `keep_alive` of idleness:
+
+    python -m bench.stub_ollama --port 11555
+    OLLAMA_HOST=http://127.0.0.1:11555 uvicorn src.main:app
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+# gemma:2b on a laptop CPU, roughly
+PROMPT_MS_PER_TOKEN = 1.0
+DECODE_MS_PER_TOKEN = 40.0
+DEFAULT_KEEP_ALIVE_S = 300
+# llama.cpp reuses the most similar slot only above this prefix ratio, else the LRU one
+SLOT_PROMPT_SIMILARITY = 0.5
+
+
+def _tokens(text: str) -> list:
+    # ~4 characters per token; runs of spaces are one token, every newline is
+    # its own (as with padding newlines), and chunks re-join exactly
+    return re.findall(r"\s?\S{1,4}| +|\s", text)
+
+
+def _common_prefix(a: list, b: list) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def _keep_alive_seconds(value: Any) -> float:
+    """
+    Ollama keep_alive: seconds as a number, or a duration such as "30m"; negative = forever.
+    """
+    if value is None:
+        return DEFAULT_KEEP_ALIVE_S
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = re.fullmatch(r"\s*(-?[\d.]+)\s*(ms|s|m|h)?\s*", str(value))
+    if not m:
+        return DEFAULT_KEEP_ALIVE_S
+    return float(m.group(1)) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[m.group(2)]
+
+
+def _user_said(prompt: str) -> str:
+    found = re.findall(r'User said: "(.*?)"', prompt, re.S)
+    return found[-1] if found else prompt[-200:]
+
+
+def _ids(text: str) -> Dict[str, str]:
+    ids = {}
+    if m := re.search(r"\border\s*(?:id\s*)?(\d+)", text, re.I):
+        ids["order_id"] = m.group(1)
+    if m := re.search(r"\bproduct\s*(?:id\s*)?(\d+)", text, re.I):
+        ids["product_id"] = m.group(1)
+    return ids
+
+
+def _record(prompt: str) -> Dict[str, str]:
+    section = prompt.split("Record:", 1)[-1].split("Conversation so far:", 1)[0]
+    return dict(re.findall(r"^\s*(\w+): (.+?)\s*$", section, re.M))
+
+
+def _field_answer(question: str, record: Dict[str, str]) -> str:
+    q = question.lower()
+    for keyword, field, text in [
+        ("deliver", "delivery_date", "It should be delivered on {}."),
+        ("ship", "shipping_date", "It ships on {}."),
+        ("status", "status", "Your order is currently {}."),
+        ("pay", "amount", "You paid ₹{} for it."),
+        ("price", "price", "It costs ₹{}."),
+        ("brand", "brand", "It's by {}."),
+    ]:
+        if keyword in q and field in record:
+            return text.format(record[field])
+    return "Here are the details you asked for."
+
+
+def default_reply(prompt: str, request: Dict[str, Any] = None) -> str:
+    """
+    Well-formed answer for the prompts the workflow sends.
+    """
+    question = _user_said(prompt)
+    if "In ONE JSON object" in prompt:
+        return json.dumps({"intent": "details", "answer": _field_answer(question, _record(prompt))})
+    if "Determine intent" in prompt:
+        ids = _ids(question)
+        intent = "details" if ids or re.search(r"status|deliver|ship|pay|price|image", question, re.I) else "none"
+        return json.dumps({"intent": intent, "relevant_data": ids})
+    if "Full Available Context" in prompt:
+        context = prompt.split("Full Available Context", 1)[1]
+        record = dict(re.findall(r"^\s*(\w+): (.+?)\s*$", context, re.M))
+        return _field_answer(question, record)
+    return "Could you tell me your order ID or describe the product you're looking for?"
+
+
+def messy_reply(prompt: str, request: Dict[str, Any] = None, rnd=random.Random(3)) -> str:
+    """
+    What gemma:2b actually does around JSON. Without `format` it wraps or
+    mangles the object; with a JSON-schema `format` the object is valid, but
+    the model often keeps emitting whitespace until num_predict.
+    """
+    clean = default_reply(prompt, request)
+    if not clean.startswith("{"):
+        return clean
+    if (request or {}).get("format"):
+        return clean + "\n" * rnd.choice([0, 0, 40, 400])
+    style = rnd.choice(["clean", "fenced", "prose", "trailing_comma", "single_quotes", "chatty"])
+    if style == "fenced":
+        return f"```json\n{clean}\n```"
+    if style == "prose":
+        return f"Sure! Here is the JSON output for the user's message:\n\n{clean}\n\nLet me know if you need anything else."
+    if style == "trailing_comma":
+        return clean[:-1] + ",}"
+    if style == "single_quotes":
+        return clean.replace('"', "'")
+    if style == "chatty":
+        return (f"**Step 1:** The intent is details.\n**Step 2:** Extracted data:\n```\n{clean}\n```\n"
+                "The user is asking about a specific order, so I've extracted the order ID. " * 3)
+    return clean
+
+
+class StubOllama(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, speed: float = 1.0, reply=default_reply, slots: int = 4):
+        """
+        speed > 1 makes every simulated duration proportionally shorter.
+        reply(prompt, request) -> str decides the raw model output.
+        slots is OLLAMA_NUM_PARALLEL (one cached prompt per slot).
+        """
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.speed = speed
+        self.reply = reply
+        self.slots = slots
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self._cache = []  # [last used, prompt tokens] per slot
+        self._unload_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def evaluate(self, tokens: list, keep_alive: Any) -> int:
+        """
+        Number of prompt tokens that must be evaluated for this request.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._unload_at is not None and now > self._unload_at:
+                self._cache = []  # Model was unloaded, and its KV cache with it
+            best, reused = None, 0
+            for slot in self._cache:
+                n = _common_prefix(slot[1], tokens)
+                if n > reused:
+                    best, reused = slot, n
+            if best is None or reused < SLOT_PROMPT_SIMILARITY * len(tokens):
+                if len(self._cache) < self.slots:
+                    best = [now, []]
+                    self._cache.append(best)
+                else:
+                    best = min(self._cache, key=lambda slot: slot[0])
+                reused = _common_prefix(best[1], tokens)
+            best[0], best[1] = now, tokens
+
+            keep_alive_s = _keep_alive_seconds(keep_alive)
+            self._unload_at = now + keep_alive_s if keep_alive_s >= 0 else None
+            self.requests += 1
+            self.prompt_tokens += len(tokens)
+            self.cached_tokens += reused
+        # The last prompt token is always evaluated
+        return max(1, len(tokens) - reused)
+
+    def count_output(self, n: int) -> None:
+        # Only tokens actually sent count, so early client disconnects save tokens
+        with self._lock:
+            self.output_tokens += n
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-stream is expected (early-stopping extractors)
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def start(self) -> "StubOllama":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _chunk(self, payload: Dict[str, Any]) -> None:
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        server: StubOllama = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path not in ("/api/chat",):
+            self.send_error(404)
+            return
+
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        prompt_tokens = server.evaluate(_tokens(prompt), request.get("keep_alive"))
+        tokens = _tokens(server.reply(prompt, request))
+        limit = (request.get("options") or {}).get("num_predict")
+        done_reason = "stop"
+        if limit is not None and limit >= 0 and len(tokens) > limit:
+            tokens, done_reason = tokens[:limit], "length"
+
+        prompt_s = prompt_tokens * PROMPT_MS_PER_TOKEN / 1000 / server.speed
+        decode_s = DECODE_MS_PER_TOKEN / 1000 / server.speed
+        base = {"model": request.get("model"), "created_at": datetime.now(timezone.utc).isoformat()}
+        final = {
+            **base,
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": done_reason,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_s * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int(len(tokens) * decode_s * 1e9),
+            "total_duration": int((prompt_s + len(tokens) * decode_s) * 1e9),
+        }
+
+        time.sleep(prompt_s)
+        if not request.get("stream", True):
+            time.sleep(len(tokens) * decode_s)
+            server.count_output(len(tokens))
+            final["message"]["content"] = "".join(tokens)
+            body = json.dumps(final).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for tok in tokens:
+                time.sleep(decode_s)
+                self._chunk({**base, "message": {"role": "assistant", "content": tok}, "done": False})
+                server.count_output(1)
+            self._chunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading early (e.g. a streaming JSON extractor got its object)
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=11555)
+    ap.add_argument("--speed", type=float, default=1.0)
+    ap.add_argument("--slots", type=int, default=4, help="Parallel slots (OLLAMA_NUM_PARALLEL)")
+    ap.add_argument("--messy", action="store_true", help="Wrap/mangle JSON like a small model does")
+    args = ap.parse_args()
+    server = StubOllama(args.port, speed=args.speed, reply=messy_reply if args.messy else default_reply,
+                        slots=args.slots)
+    print(f"🤖 Stub Ollama on {server.base_url}")
+    server.serve_forever()
@@ -1,4 +1,4 @@
 import os
 
 # DB path now lives in /data folder
-DB_PATH = os.path.abspath("data/fashion_ai.db")
\ No newline at end of file
+DB_PATH = os.path.abspath(os.getenv("FASHION_DB_PATH", "data/fashion_ai.db"))
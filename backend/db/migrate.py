@@ -0,0 +1,76 @@
+import os
+import sqlite3
+from db.config import DB_PATH
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.sql")
+
+# Dependency order: triggers reference columns and tables created before them
+OBJECT_ORDER = {"table": 0, "index": 1, "trigger": 2}
+
+def _reference_schema() -> sqlite3.Connection:
+    """
+    schema.sql applied to an in-memory database: what an up-to-date DB looks like.
+    """
+    ref = sqlite3.connect(":memory:")
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        ref.executescript(f.read())
+    return ref
+
+def _objects(conn) -> dict:
+    rows = conn.execute("SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL").fetchall()
+    return {name: (kind, sql) for kind, name, sql in rows}
+
+def _columns(conn, table: str) -> list:
+    return conn.execute(f"PRAGMA table_info({table})").fetchall()
+
+def migrate(db_path: str = DB_PATH) -> list:
+    """
+    Bring an existing database up to schema.sql without touching its rows:
+    adds missing columns (e.g. VERSION), tables and triggers. Idempotent, and
+    a no-op when no database exists yet (run init_db for that).
+    Returns what was added.
+    """
+    if not os.path.exists(db_path):
+        return []
+    ref = _reference_schema()
+    conn = sqlite3.connect(db_path)
+    added = []
+    try:
+        wanted, existing = _objects(ref), _objects(conn)
+        with conn:
+            for name, (kind, sql) in sorted(wanted.items(), key=lambda kv: OBJECT_ORDER[kv[1][0]]):
+                if name not in existing:
+                    conn.execute(sql)
+                    added.append(f"{kind} {name}")
+                elif kind == "table":
+                    have = {col[1] for col in _columns(conn, name)}
+                    for _, col, col_type, notnull, default, _ in _columns(ref, name):
+                        if col in have:
+                            continue
+                        definition = f"{col} {col_type}"
+                        definition += " NOT NULL" if notnull else ""
+                        definition += f" DEFAULT {default}" if default is not None else ""
+                        conn.execute(f"ALTER TABLE {name} ADD COLUMN {definition}")
+                        added.append(f"column {name}.{col}")
+
+            # Seed rows schema.sql inserts alongside its tables
+            if "table PRODUCTS_CHANGES" in added:
+                conn.execute("INSERT OR IGNORE INTO PRODUCTS_CHANGES (ID, SEQ) VALUES (1, 0)")
+    finally:
+        conn.close()
+        ref.close()
+
+    # Aggregates created just now start empty: fill them from the existing ORDERS
+    if "table USER_ORDER_SUMMARY" in added:
+        from src.services import order_summary
+        order_summary.rebuild(db_path)
+
+    for item in added:
+        print(f"🛠️ Migrated {db_path}: added {item}")
+    return added
+
+if __name__ == "__main__":
+    if not os.path.exists(DB_PATH):
+        print(f"❌ No database at {DB_PATH} (create it with python -m db.init_db)")
+    elif not migrate():
+        print(f"✅ Database schema up to date at {DB_PATH}")
@@ -27,9 +27,41 @@ CREATE TABLE PRODUCTS (
     FABRIC TEXT,
     HAS_DUPATTA INTEGER,
     IS_SUSTAINABLE INTEGER,
-    SEARCH_TEXT TEXT
+    SEARCH_TEXT TEXT,
+    VERSION INTEGER NOT NULL DEFAULT 1
 );
 
+CREATE TRIGGER PRODUCTS_BUMP_VERSION
+AFTER UPDATE ON PRODUCTS
+FOR EACH ROW WHEN NEW.VERSION = OLD.VERSION
+BEGIN
+    UPDATE PRODUCTS SET VERSION = OLD.VERSION + 1 WHERE P_ID = NEW.P_ID;
+END;
+
+-- Change counter for PRODUCTS (any insert/update/delete): lets readers that
+-- cache the whole table (services/catalog.py) detect changes with one row read
+DROP TABLE IF EXISTS PRODUCTS_CHANGES;
+CREATE TABLE PRODUCTS_CHANGES (
+    ID INTEGER PRIMARY KEY CHECK (ID = 1),
+    SEQ INTEGER NOT NULL
+);
+INSERT INTO PRODUCTS_CHANGES (ID, SEQ) VALUES (1, 0);
+
+CREATE TRIGGER PRODUCTS_CHANGES_INSERT AFTER INSERT ON PRODUCTS
+BEGIN
+    UPDATE PRODUCTS_CHANGES SET SEQ = SEQ + 1 WHERE ID = 1;
+END;
+
+CREATE TRIGGER PRODUCTS_CHANGES_UPDATE AFTER UPDATE ON PRODUCTS
+BEGIN
+    UPDATE PRODUCTS_CHANGES SET SEQ = SEQ + 1 WHERE ID = 1;
+END;
+
+CREATE TRIGGER PRODUCTS_CHANGES_DELETE AFTER DELETE ON PRODUCTS
+BEGIN
+    UPDATE PRODUCTS_CHANGES SET SEQ = SEQ + 1 WHERE ID = 1;
+END;
+
 -- ORDERS table with foreign keys to USERS and PRODUCTS
 DROP TABLE IF EXISTS ORDERS;
 CREATE TABLE ORDERS (
@@ -43,8 +75,130 @@ CREATE TABLE ORDERS (
     AMOUNT REAL NOT NULL,
     STATUS TEXT CHECK(STATUS IN ('ordered','packed','shipped','out for delivery','delivered')),
     DELIVERY_PARTNER_NO TEXT,
+    VERSION INTEGER NOT NULL DEFAULT 1,
     FOREIGN KEY(USER_ID) REFERENCES USERS(USER_ID),
     FOREIGN KEY(PRODUCT_ID) REFERENCES PRODUCTS(P_ID)
 );
 
+CREATE INDEX IF NOT EXISTS IDX_ORDERS_USER ON ORDERS(USER_ID, ORDER_DATE);
+
+-- Bump the row version on every change so cached copies can be revalidated
+CREATE TRIGGER ORDERS_BUMP_VERSION
+AFTER UPDATE ON ORDERS
+FOR EACH ROW WHEN NEW.VERSION = OLD.VERSION
+BEGIN
+    UPDATE ORDERS SET VERSION = OLD.VERSION + 1 WHERE ORDER_ID = NEW.ORDER_ID;
+END;
+
+-- -------------------------------
+-- Per-user order aggregates, maintained incrementally by the triggers below
+-- (every ORDERS insert/delete/update, including seed_orders). Check or rebuild
+-- them with: python -m src.services.order_summary [--rebuild]
+-- -------------------------------
+DROP TABLE IF EXISTS USER_ORDER_SUMMARY;
+CREATE TABLE USER_ORDER_SUMMARY (
+    USER_ID INTEGER PRIMARY KEY,
+    ORDER_COUNT INTEGER NOT NULL DEFAULT 0,
+    TOTAL_AMOUNT REAL NOT NULL DEFAULT 0,
+    LAST_ORDER_DATE DATE
+);
+
+DROP TABLE IF EXISTS USER_ORDER_STATUS;
+CREATE TABLE USER_ORDER_STATUS (
+    USER_ID INTEGER NOT NULL,
+    STATUS TEXT NOT NULL,
+    ORDER_COUNT INTEGER NOT NULL DEFAULT 0,
+    AMOUNT REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (USER_ID, STATUS)
+);
+
+DROP TABLE IF EXISTS USER_ORDER_MONTHLY;
+CREATE TABLE USER_ORDER_MONTHLY (
+    USER_ID INTEGER NOT NULL,
+    MONTH TEXT NOT NULL,  -- YYYY-MM of ORDER_DATE
+    ORDER_COUNT INTEGER NOT NULL DEFAULT 0,
+    AMOUNT REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (USER_ID, MONTH)
+);
+
+-- INSERT OR REPLACE deletes the old row without firing ORDERS_SUMMARY_DELETE
+-- (unless recursive_triggers is on), which would double-count it. Inserting an
+-- existing ORDER_ID is refused before conflict resolution: use UPDATE instead.
+CREATE TRIGGER ORDERS_NO_REPLACE
+BEFORE INSERT ON ORDERS
+WHEN NEW.ORDER_ID IS NOT NULL AND EXISTS (SELECT 1 FROM ORDERS WHERE ORDER_ID = NEW.ORDER_ID)
+BEGIN
+    SELECT RAISE(ABORT, 'ORDER_ID exists: update ORDERS rows instead of REPLACE (keeps USER_ORDER_* in sync)');
+END;
+
+CREATE TRIGGER ORDERS_SUMMARY_INSERT
+AFTER INSERT ON ORDERS
+BEGIN
+    INSERT INTO USER_ORDER_SUMMARY (USER_ID, ORDER_COUNT, TOTAL_AMOUNT, LAST_ORDER_DATE)
+    VALUES (NEW.USER_ID, 1, NEW.AMOUNT, NEW.ORDER_DATE)
+    ON CONFLICT(USER_ID) DO UPDATE SET
+        ORDER_COUNT = ORDER_COUNT + 1,
+        TOTAL_AMOUNT = TOTAL_AMOUNT + excluded.TOTAL_AMOUNT,
+        LAST_ORDER_DATE = NULLIF(MAX(COALESCE(LAST_ORDER_DATE, ''), COALESCE(excluded.LAST_ORDER_DATE, '')), '');
+
+    INSERT INTO USER_ORDER_STATUS (USER_ID, STATUS, ORDER_COUNT, AMOUNT)
+    VALUES (NEW.USER_ID, COALESCE(NEW.STATUS, 'unknown'), 1, NEW.AMOUNT)
+    ON CONFLICT(USER_ID, STATUS) DO UPDATE SET
+        ORDER_COUNT = ORDER_COUNT + 1, AMOUNT = AMOUNT + excluded.AMOUNT;
+
+    INSERT INTO USER_ORDER_MONTHLY (USER_ID, MONTH, ORDER_COUNT, AMOUNT)
+    VALUES (NEW.USER_ID, COALESCE(strftime('%Y-%m', NEW.ORDER_DATE), 'unknown'), 1, NEW.AMOUNT)
+    ON CONFLICT(USER_ID, MONTH) DO UPDATE SET
+        ORDER_COUNT = ORDER_COUNT + 1, AMOUNT = AMOUNT + excluded.AMOUNT;
+END;
+
+CREATE TRIGGER ORDERS_SUMMARY_DELETE
+AFTER DELETE ON ORDERS
+BEGIN
+    -- LAST_ORDER_DATE can't be decremented; re-read it through IDX_ORDERS_USER
+    UPDATE USER_ORDER_SUMMARY SET
+        ORDER_COUNT = ORDER_COUNT - 1,
+        TOTAL_AMOUNT = TOTAL_AMOUNT - OLD.AMOUNT,
+        LAST_ORDER_DATE = (SELECT MAX(ORDER_DATE) FROM ORDERS WHERE USER_ID = OLD.USER_ID)
+    WHERE USER_ID = OLD.USER_ID;
+    DELETE FROM USER_ORDER_SUMMARY WHERE USER_ID = OLD.USER_ID AND ORDER_COUNT <= 0;
+
+    UPDATE USER_ORDER_STATUS SET ORDER_COUNT = ORDER_COUNT - 1, AMOUNT = AMOUNT - OLD.AMOUNT
+    WHERE USER_ID = OLD.USER_ID AND STATUS = COALESCE(OLD.STATUS, 'unknown');
+    DELETE FROM USER_ORDER_STATUS WHERE USER_ID = OLD.USER_ID AND ORDER_COUNT <= 0;
+
+    UPDATE USER_ORDER_MONTHLY SET ORDER_COUNT = ORDER_COUNT - 1, AMOUNT = AMOUNT - OLD.AMOUNT
+    WHERE USER_ID = OLD.USER_ID AND MONTH = COALESCE(strftime('%Y-%m', OLD.ORDER_DATE), 'unknown');
+    DELETE FROM USER_ORDER_MONTHLY WHERE USER_ID = OLD.USER_ID AND ORDER_COUNT <= 0;
+END;
+
+-- An update is the old row leaving the aggregates and the new row entering them
+CREATE TRIGGER ORDERS_SUMMARY_UPDATE
+AFTER UPDATE OF USER_ID, STATUS, AMOUNT, ORDER_DATE ON ORDERS
+BEGIN
+    UPDATE USER_ORDER_SUMMARY SET ORDER_COUNT = ORDER_COUNT - 1, TOTAL_AMOUNT = TOTAL_AMOUNT - OLD.AMOUNT
+    WHERE USER_ID = OLD.USER_ID;
+    INSERT INTO USER_ORDER_SUMMARY (USER_ID, ORDER_COUNT, TOTAL_AMOUNT)
+    VALUES (NEW.USER_ID, 1, NEW.AMOUNT)
+    ON CONFLICT(USER_ID) DO UPDATE SET
+        ORDER_COUNT = ORDER_COUNT + 1, TOTAL_AMOUNT = TOTAL_AMOUNT + excluded.TOTAL_AMOUNT;
+    UPDATE USER_ORDER_SUMMARY SET LAST_ORDER_DATE = (SELECT MAX(ORDER_DATE) FROM ORDERS WHERE USER_ID = USER_ORDER_SUMMARY.USER_ID)
+    WHERE USER_ID IN (OLD.USER_ID, NEW.USER_ID);
+    DELETE FROM USER_ORDER_SUMMARY WHERE USER_ID = OLD.USER_ID AND ORDER_COUNT <= 0;
+
+    UPDATE USER_ORDER_STATUS SET ORDER_COUNT = ORDER_COUNT - 1, AMOUNT = AMOUNT - OLD.AMOUNT
+    WHERE USER_ID = OLD.USER_ID AND STATUS = COALESCE(OLD.STATUS, 'unknown');
+    INSERT INTO USER_ORDER_STATUS (USER_ID, STATUS, ORDER_COUNT, AMOUNT)
+    VALUES (NEW.USER_ID, COALESCE(NEW.STATUS, 'unknown'), 1, NEW.AMOUNT)
+    ON CONFLICT(USER_ID, STATUS) DO UPDATE SET
+        ORDER_COUNT = ORDER_COUNT + 1, AMOUNT = AMOUNT + excluded.AMOUNT;
+    DELETE FROM USER_ORDER_STATUS WHERE USER_ID = OLD.USER_ID AND ORDER_COUNT <= 0;
 
+    UPDATE USER_ORDER_MONTHLY SET ORDER_COUNT = ORDER_COUNT - 1, AMOUNT = AMOUNT - OLD.AMOUNT
+    WHERE USER_ID = OLD.USER_ID AND MONTH = COALESCE(strftime('%Y-%m', OLD.ORDER_DATE), 'unknown');
+    INSERT INTO USER_ORDER_MONTHLY (USER_ID, MONTH, ORDER_COUNT, AMOUNT)
+    VALUES (NEW.USER_ID, COALESCE(strftime('%Y-%m', NEW.ORDER_DATE), 'unknown'), 1, NEW.AMOUNT)
+    ON CONFLICT(USER_ID, MONTH) DO UPDATE SET
+        ORDER_COUNT = ORDER_COUNT + 1, AMOUNT = AMOUNT + excluded.AMOUNT;
+    DELETE FROM USER_ORDER_MONTHLY WHERE USER_ID = OLD.USER_ID AND ORDER_COUNT <= 0;
+END;
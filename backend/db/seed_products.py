@@ -6,6 +6,15 @@ from db.config import DB_PATH
 #DB_PATH = os.path.abspath("backend/fashion_ai.db")
 CLEAN_DATA_PATH = os.path.abspath("data/fashion_dataset_clean.csv")
 
+UPSERT_SET = ", ".join(
+    f"{col} = excluded.{col}"
+    for col in [
+        "NAME", "PRICE", "COLOUR", "BRAND", "IMG", "RATINGCOUNT", "AVG_RATING", "DESCRIPTION",
+        "P_ATTRIBUTES", "TOP_TYPE", "SLEEVE_LENGTH", "OCCASION", "PRINT_PATTERN", "FABRIC",
+        "HAS_DUPATTA", "IS_SUSTAINABLE", "SEARCH_TEXT"
+    ]
+)
+
 
 def seed_products():
     if not os.path.exists(CLEAN_DATA_PATH):
@@ -27,15 +36,16 @@ def seed_products():
             continue
 
         try:
-            # Inside cursor.execute(...)
-            cursor.execute("""
-                INSERT OR REPLACE INTO PRODUCTS (
+            # Upsert (not REPLACE) so a reseed bumps the row VERSION instead of resetting it
+            cursor.execute(f"""
+                INSERT INTO PRODUCTS (
                     P_ID, NAME, PRICE, COLOUR, BRAND, IMG,
                     RATINGCOUNT, AVG_RATING, DESCRIPTION, P_ATTRIBUTES,
                     TOP_TYPE, SLEEVE_LENGTH, OCCASION, PRINT_PATTERN, FABRIC,
                     HAS_DUPATTA, IS_SUSTAINABLE, SEARCH_TEXT
                 )
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(P_ID) DO UPDATE SET {UPSERT_SET}
             """, (
                 p_id, name, float(price), str(row.get("colour", "")), str(row.get("brand", "")),
                 str(row.get("img", "")), int(row.get("ratingCount", 0)), float(row.get("avg_rating", 0.0)),
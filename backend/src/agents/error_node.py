@@ -1,7 +1,8 @@
-from langchain_ollama.chat_models import ChatOllama
+from src.services import llm, budget
+from src.agents import prompts
 from typing import Dict, Any
 
-ollama_model = ChatOllama(model="gemma:2b")
+ollama_model = llm.chat_model()
 
 def error_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -11,16 +12,25 @@ def error_node(state: Dict[str, Any]) -> Dict[str, Any]:
     error_text = state.get("error_msg", "An unknown error occurred.")
     user_input = state.get("latest_input", "")
 
-    prompt = f"""
-    The user said: "{user_input}".
-    An error occurred: "{error_text}".
-    Respond politely, apologize if needed, and suggest a next step or correction.
-    """
-    response = ollama_model.invoke(prompt)
+    content = None
+    if budget.allows(state, "error"):
+        prompt = prompts.render("error", error=error_text, user_input=user_input)
+        try:
+            content = llm.invoke(
+                ollama_model, prompt, max_tokens=budget.token_cap(state), name="error", wait_s=budget.wait_s(state)
+            ).content
+        except TimeoutError:
+            budget.degrade(state, "error")
+    if content is None:
+        # Out of time for an LLM call
+        content = (
+            f"Sorry, something went wrong: {error_text} "
+            "Please check the order or product ID and try again."
+        )
 
     state["messages"].append({
         "role": "error_agent",
-        "content": response.content
+        "content": content
     })
     state["error_msg"] = None
     return state
@@ -0,0 +1,125 @@
+from src.services import llm, budget, metrics
+from typing import Dict, Any, Optional
+from src.agents.router_node import regex_extract, ROUTER_SCHEMA
+from src.agents import prompts
+from src.agents.prompts import format_conversation, format_record, needs_description, with_description
+from src.agents.sql_node import sql_node, product_description
+from src.agents.summary_node import is_summary_question
+from src.services.order_cache import order_working_set
+from src.services.image_cache import image_url
+from src.agents.state import Record, record_from_row, record_view
+
+ollama_model = llm.chat_model()
+
+# Record fields shown to the model; the long DESCRIPTION only when the question needs it
+CONTEXT_FIELDS = [
+    "order_id", "product_id", "status", "order_date", "shipping_date", "delivery_date",
+    "amount", "name", "price", "brand", "colour", "description"
+]
+
+# Intent plus the answer text. The IDs are already known (that's what fetched
+# the record), so echoing relevant_data back would only add output tokens.
+FUSED_SCHEMA = {
+    "type": "object",
+    "properties": {"intent": ROUTER_SCHEMA["properties"]["intent"], "answer": {"type": "string"}},
+    "required": ["intent", "answer"],
+}
+
+
+def _load_record(ids: Dict[str, Any], user_id: Optional[int]) -> Optional[Record]:
+    """
+    The order/product the turn is about, if it can be fetched cheaply by ID.
+    """
+    record = None
+    if ids.get("order_id"):
+        row = order_working_set.get(user_id, ids["order_id"]) or sql_node({"order_id": ids["order_id"]}, user_id)
+        record = record_from_row(row)
+    # "product id 1020" also reads as order_id=1020 (regex_extract), so a missed order falls through
+    if record is None and ids.get("product_id"):
+        record = record_from_row(sql_node({"product_id": ids["product_id"]}, user_id))
+    return record
+
+
+def _fall_back(state: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    print(f"↪️ Fused mode skipped ({reason}), using router + viewer")
+    metrics.incr(f"fused.fallback.{reason}")
+    state["fused"] = False
+    return state
+
+
+def fused_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Route-and-answer in one generation for "details" turns whose record is
+    already known (or fetchable by ID). Anything else sets fused=False and
+    the two-call graph (router → viewer) takes over.
+    """
+    if "messages" not in state:
+        state["messages"] = []
+
+    user_input = state.get("latest_input", "").strip()
+    prev_relevant_data = state.get("relevant_data", {})
+    user_id = state.get("user_id")
+    if not user_input:
+        return _fall_back(state, "empty_input")
+    if is_summary_question(user_input):
+        # The router sends these to the aggregate tables without an LLM call
+        return _fall_back(state, "summary")
+
+    # IDs named in this message win over the ones carried in context
+    ids = regex_extract(user_input, {})["relevant_data"] or prev_relevant_data
+    record = _load_record(ids, user_id)
+    if record is None:
+        return _fall_back(state, "no_record")
+
+    relevant_data = {**prev_relevant_data, **record.refs()}
+    view = {**relevant_data, **record_view(record)}
+
+    # Image requests need no generation at all
+    lowered = user_input.lower()
+    if ("image" in lowered or "img" in lowered) and record.img:
+        return _finish(state, "details", relevant_data, image_url(record.product_id, record.img), record)
+
+    if not budget.allows(state, "fused"):
+        return _fall_back(state, "budget")
+
+    if needs_description(user_input):
+        view = with_description(view, product_description(record.product_id))
+    fused_prompt = prompts.render(
+        "fused",
+        record=format_record(view, CONTEXT_FIELDS),
+        conversation=format_conversation(state.get("messages", [])),
+        user_input=user_input,
+    )
+
+    try:
+        output, _, _ = llm.stream_json(
+            ollama_model, fused_prompt, "fused", max_tokens=budget.token_cap(state), schema=FUSED_SCHEMA,
+            wait_s=budget.wait_s(state)
+        )
+    except TimeoutError:
+        # Identical generation still running past our deadline
+        budget.degrade(state, "fused")
+        return _fall_back(state, "budget")
+    try:
+        if output is None:
+            raise ValueError("No JSON object in fused output")
+        intent = output.get("intent", "none")
+        answer = str(output.get("answer") or "").strip()
+    except Exception as e:
+        print(f"❌ Fused output parsing failed: {e}")
+        return _fall_back(state, "parse_error")
+
+    if intent != "details" or not answer:
+        return _fall_back(state, "not_details")
+    return _finish(state, intent, relevant_data, answer, record)
+
+
+def _finish(state: Dict[str, Any], intent: str, relevant_data: Dict[str, Any], answer: str, record: Record) -> Dict[str, Any]:
+    metrics.incr("fused.answered")
+    state["intent"] = intent
+    state["relevant_data"] = relevant_data
+    state["record"] = record
+    state["messages"].append({"role": "viewer_agent", "content": answer})
+    state["error_msg"] = None
+    state["fused"] = True
+    return state
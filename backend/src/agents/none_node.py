@@ -1,23 +1,32 @@
-from langchain_ollama.chat_models import ChatOllama
+from src.services import llm, budget
+from src.agents import prompts
 from typing import Dict, Any
 
-ollama_model = ChatOllama(model="gemma:2b")
+ollama_model = llm.chat_model()
 
 def none_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handles vague or unclear queries politely.
     """
     user_input = state.get("latest_input", "")
-    prompt = f"""
-    The user said: "{user_input}".
-    You could not determine intent.
-    Politely ask for clarification or suggest possible things they can do
-    (like checking an order, viewing a product, or exploring recommendations).
-    """
-    response = ollama_model.invoke(prompt)
+    content = None
+    if budget.allows(state, "none"):
+        prompt = prompts.render("none", user_input=user_input)
+        try:
+            content = llm.invoke(
+                ollama_model, prompt, max_tokens=budget.token_cap(state), name="none", wait_s=budget.wait_s(state)
+            ).content
+        except TimeoutError:
+            budget.degrade(state, "none")
+    if content is None:
+        # Out of time for an LLM call
+        content = (
+            "I'm not sure what you're looking for. You can ask me about an order "
+            "(e.g. 'status of order 12'), a product ('show product 1020'), or ask for recommendations."
+        )
 
     state["messages"].append({
         "role": "none_agent",
-        "content": response.content
+        "content": content
     })
     return state
@@ -0,0 +1,202 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from src.agents.state import RelevantData
+
+# -------------------------------
+# Prompt registry
+# -------------------------------
+# Every prompt is a static system message (instructions, schema, examples —
+# byte-identical on every call) followed by a user message with the per-call
+# values. Ollama keeps the evaluated prefix in its KV cache, so only the
+# suffix is processed each turn as long as the model stays loaded (see
+# llm.KEEP_ALIVE). Nothing variable may go into `system`.
+
+
+@dataclass(frozen=True)
+class Prompt:
+    name: str
+    system: str
+    user: str  # str.format template for the variable suffix
+
+    @property
+    def prefix_hash(self) -> str:
+        return hashlib.sha256(self.system.encode("utf-8")).hexdigest()[:12]
+
+    def render(self, **values: Any) -> List[BaseMessage]:
+        return [SystemMessage(content=self.system), HumanMessage(content=self.user.format(**values))]
+
+
+PROMPTS: Dict[str, Prompt] = {}
+
+
+def register(name: str, system: str, user: str) -> Prompt:
+    prompt = Prompt(name=name, system=system.strip() + "\n", user=user.strip())
+    PROMPTS[name] = prompt
+    return prompt
+
+
+def render(name: str, **values: Any) -> List[BaseMessage]:
+    return PROMPTS[name].render(**values)
+
+
+def format_conversation(messages: List[Dict[str, Any]], last: int = 4) -> str:
+    """
+    Recent turns as "role: content" lines (stable formatting, no Python reprs).
+    """
+    return "\n".join(f"{m.get('role')}: {m.get('content')}" for m in messages[-last:]) or "(none)"
+
+
+def format_record(record: Dict[str, Any], keys=None) -> str:
+    return "\n".join(f"{k}: {record[k]}" for k in (keys or record) if k in record)
+
+
+# Questions answered from the product DESCRIPTION rather than a single field
+DESCRIPTION_HINTS = (
+    "about", "describe", "description", "detail", "made of", "material", "fabric",
+    "feature", "fit", "wash", "care", "look like", "style", "pattern", "sleeve", "length",
+)
+MAX_DESCRIPTION_CHARS = 800
+
+
+def needs_description(user_input: str) -> bool:
+    text = user_input.lower()
+    return any(hint in text for hint in DESCRIPTION_HINTS)
+
+
+def with_description(view: Dict[str, Any], description: Optional[str]) -> Dict[str, Any]:
+    """
+    `view` plus the (clipped) product description, for one prompt.
+    """
+    if not description or not str(description).strip():
+        return view
+    return {**view, "description": str(description).strip()[:MAX_DESCRIPTION_CHARS]}
+
+
+RELEVANT_DATA_FORMAT = PydanticOutputParser(pydantic_object=RelevantData).get_format_instructions()
+
+# -------------------------------
+# Prompts
+# -------------------------------
+ROUTER = register(
+    "router",
+    system="""
+You route messages for a fashion store assistant and extract structured data.
+
+Step 1: Determine intent
+- "details" if asking for product/order info shipping details product image etc or any information to be extracted from sql
+- "order_summary" if asking about all their orders together: money spent, how many orders, orders in transit, last order
+- "billing" if asking to buy or payment after recommendation
+- "recommendation" if asking for similar products or suggestions
+- "none" otherwise
+
+Step 2: You are a structured information extractor.
+The user might mention order IDs, product IDs, or describe products.
+Return relevant data as JSON following this schema:
+""" + RELEVANT_DATA_FORMAT + """
+
+Examples:
+- "what is my order 12" → { "order_id": "12" }
+- "show product id 1020" → { "product_id": "1020" }
+- "find blue kurta by W" → { "colour": "blue", "brand": "W" }
+- "for order of id 9" → { "order_id": "9" }
+
+Example output:
+{
+  "intent": "details",
+  "relevant_data": {
+      "order_id": "1234",
+      "product_id": null,
+      "description": "red printed kurta"
+  }
+}
+""",
+    user="""
+Conversation so far:
+{conversation}
+
+User said: "{user_input}"
+""",
+)
+
+VIEWER = register(
+    "viewer",
+    system="""
+You answer a fashion store customer's question about one order or product.
+Respond concisely and naturally based ONLY on the user's latest query and the context sent with it.
+
+RULES:
+1. **Conciseness:** Provide the specific requested value (e.g., status, date, price) in one or two short, natural sentences.
+2. **Anti-Hallucination:** DO NOT mention any fields that the user did not ask for. DO NOT state that data is unavailable if it is present in the context.
+3. **Focus:** If the user asks for 'status', give the status. If they ask for 'delivery date', give the delivery date.
+
+Example:
+User: "what is the order status"
+Response: "Your order is currently shipped."
+
+Example:
+User: "what is the delivery date"
+Response: "The estimated delivery date is 2025-01-14."
+""",
+    user="""
+Full Available Context (Use ONLY this information to construct your response):
+{context}
+
+User said: "{user_input}"
+""",
+)
+
+FUSED = register(
+    "fused",
+    system="""
+You are a shopping assistant. In ONE JSON object, classify the user's message
+and answer it from the order/product record sent with it.
+
+Fields:
+- "intent": "details" (order/product info, status, dates, price, image),
+  "billing" (buy/pay), "recommendation" (similar products/suggestions) or "none"
+- "answer": one or two short sentences giving ONLY the value the user asked for,
+  using ONLY the record. Empty string if intent is not "details".
+
+Output JSON only, e.g.:
+{"intent": "details", "answer": "Your order is currently shipped."}
+""",
+    user="""
+Record:
+{record}
+
+Conversation so far:
+{conversation}
+
+User said: "{user_input}"
+""",
+)
+
+NONE = register(
+    "none",
+    system="""
+You are the assistant of a fashion store. The intent of the user's message could not be determined.
+Politely ask for clarification or suggest possible things they can do
+(like checking an order, viewing a product, or exploring recommendations).
+""",
+    user="""
+User said: "{user_input}"
+""",
+)
+
+ERROR = register(
+    "error",
+    system="""
+You are the assistant of a fashion store. An error occurred while handling the user's message.
+Respond politely, apologize if needed, and suggest a next step or correction.
+""",
+    user="""
+An error occurred: "{error}"
+
+User said: "{user_input}"
+""",
+)
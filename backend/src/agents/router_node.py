@@ -1,27 +1,63 @@
-from langchain_ollama.chat_models import ChatOllama
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+from src.services import llm, budget, metrics
+from src.agents.summary_node import is_summary_question
+from src.agents.state import RelevantData
+from src.agents import prompts
+from src.agents.prompts import format_conversation
 from typing import Dict, Any, List
-import json
 import re
 
-ollama_model = ChatOllama(model="gemma:2b")
+ollama_model = llm.chat_model()
 
-# ---------- Schema ----------
-class RelevantData(BaseModel):
-    order_id: str | None = Field(None)
-    product_id: str | None = Field(None)
-    name: str | None = Field(None)
-    brand: str | None = Field(None)
-    colour: str | None = Field(None)
-    fabric: str | None = Field(None)
-    occasion: str | None = Field(None)
-    print_pattern: str | None = Field(None)
-    top_type: str | None = Field(None)
-    sleeve_length: str | None = Field(None)
-    description: str | None = Field(None)
+INTENTS = ["details", "order_summary", "billing", "recommendation", "none"]
 
-parser = PydanticOutputParser(pydantic_object=RelevantData)
+# Full router reply (intent + RelevantData), enforced through Ollama structured outputs
+ROUTER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": INTENTS},
+        "relevant_data": RelevantData.model_json_schema(),
+    },
+    "required": ["intent", "relevant_data"],
+}
+# The JSON above fits comfortably in this; anything longer is rambling
+ROUTER_MAX_TOKENS = 128
+
+def regex_extract(user_input: str, prev_relevant_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Cheap router: regex for new IDs on top of the previous context.
+    Used when LLM parsing fails or the request budget is nearly spent.
+    """
+    # 1. Start the new extracted data as a copy of the previous state (Context Persistence Guarantee)
+    newly_extracted_data_for_merge = dict(prev_relevant_data)
+
+    # 2. Add basic regex for NEW IDs (will overwrite old IDs if new ones are explicitly stated)
+    user_input_lower = user_input.lower()
+    if order_match := re.search(r"\b(?:order|id)\s*(\d+)\b", user_input_lower):
+        newly_extracted_data_for_merge["order_id"] = order_match.group(1)
+        print(f"▶️ Regex found new order_id: {order_match.group(1)}")
+    if product_match := re.search(r"\b(?:product|item)\s*(?:id|number)?\s*(\d+)\b", user_input_lower):
+        newly_extracted_data_for_merge["product_id"] = product_match.group(1)
+        print(f"▶️ Regex found new product_id: {product_match.group(1)}")
+
+    # 3. CRITICAL: Determine Intent based on available data
+    if is_summary_question(user_input):
+        # Account-level question (spend, counts, in transit): answered from aggregates
+        intent = "order_summary"
+    elif newly_extracted_data_for_merge:
+        # If we have any data (new ID or persistent old context), we assume the intent is 'details'
+        intent = "details"
+    else:
+        # If no data, we default to 'none'
+        intent = "none"
+
+    return {
+        "intent": intent,
+        "relevant_data": newly_extracted_data_for_merge
+    }
+
+def build_routing_prompt(messages: List[Dict[str, Any]], user_input: str) -> list:
+    # Static instructions/schema/examples first (cacheable), this turn's text last
+    return prompts.render("router", conversation=format_conversation(messages), user_input=user_input)
 
 def router_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -37,92 +73,54 @@ def router_node(state: Dict[str, Any]) -> Dict[str, Any]:
     
     print(f"🧩 Incoming relevant_data: {prev_relevant_data}")
 
-    # ... (routing_prompt preparation remains the same)
-
-    routing_prompt = f"""
-    Conversation so far:
-    {state.get("messages", [])[-4:]}
-
-    User said: "{user_input}"
-
-    Step 1: Determine intent
-    - "details" if asking for product/order info shipping details product image etc or any information to be extracted from sql
-    - "billing" if asking to buy or payment after recommendation
-    - "recommendation" if asking for similar products or suggestions
-    - "none" otherwise
-
-    Step 2: You are a structured information extractor.
-    The user might mention order IDs, product IDs, or describe products.
-    Return relevant data as JSON following this schema:
-    {parser.get_format_instructions()}
-
-    Examples:
-    - "what is my order 12" → {{ "order_id": "12" }}
-    - "show product id 1020" → {{ "product_id": "1020" }}
-    - "find blue kurta by W" → {{ "colour": "blue", "brand": "W" }}
-    - "for order of id 9" → {{ "order_id": "9" }}
-
-    Message: "{user_input}"
-
-    Example output:
-    {{
-      "intent": "details",
-      "relevant_data": {{
-          "order_id": "1234",
-          "product_id": null,
-          "description": "red printed kurta"
-      }}
-    }}
-    """
-
-    llm_response = ollama_model.invoke(routing_prompt)
-    
-    try:
-        # 1. Robustly parse the entire JSON object from the LLM
-        full_output = json.loads(llm_response.content) 
-        
-        # 2. Extract intent
-        intent = full_output.get("intent", "none")
+    # Aggregate questions are unambiguous by pattern and answered without the LLM
+    if is_summary_question(user_input):
+        metrics.incr("router.summary_shortcut")
+        extracted_data = regex_extract(user_input, prev_relevant_data)
+    # Out of time for an LLM call: use the regex router
+    elif not budget.allows(state, "router"):
+        extracted_data = regex_extract(user_input, prev_relevant_data)
+    else:
+        routing_prompt = build_routing_prompt(state.get("messages", []), user_input)
+
+        # Structured output: the server is constrained to ROUTER_SCHEMA, the reply is
+        # parsed while streaming and cut off once the object closes
+        try:
+            full_output, raw_output, _ = llm.stream_json(
+                ollama_model, routing_prompt, "router",
+                max_tokens=budget.token_cap(state, limit=ROUTER_MAX_TOKENS),
+                schema=ROUTER_SCHEMA, wait_s=budget.wait_s(state),
+            )
+        except TimeoutError:
+            # Identical generation still running past our deadline
+            budget.degrade(state, "router")
+            full_output, raw_output = None, ""  # → regex fallback below
+
+        try:
+            # 1. Robustly parse the entire JSON object from the LLM
+            if full_output is None:
+                raise ValueError(f"No JSON object in router output: {raw_output[:200]!r}")
+
+            # 2. Extract intent
+            intent = full_output.get("intent", "none")
+            if intent not in INTENTS:
+                intent = "none"
+
+            # 3. Parse relevant_data using Pydantic
+            relevant_data_content = full_output.get("relevant_data") or {}
+            parsed_relevant_data = RelevantData(**relevant_data_content)
+
+            extracted_data = {
+                "intent": intent,
+                "relevant_data": parsed_relevant_data.dict(exclude_none=True)
+            }
+            print("✅ Pydantic Data Parsing Successful.")
+
+        except Exception as e:
+            # --- DATA EXTRACTION FALLBACK (CRITICAL FIX) ---
+            print(f"❌ Pydantic Data Parsing failed: {e}. Falling back to Context/Regex...")
         
-        # 3. Parse relevant_data using Pydantic
-        relevant_data_content = full_output.get("relevant_data", {})
-        parsed_relevant_data = parser.parse_obj(relevant_data_content)
-        
-        extracted_data = {
-            "intent": intent,
-            "relevant_data": parsed_relevant_data.dict(exclude_none=True)
-        }
-        print("✅ Pydantic Data Parsing Successful.")
-        
-    except Exception as e:
-        # --- DATA EXTRACTION FALLBACK (CRITICAL FIX) ---
-        print(f"❌ Pydantic Data Parsing failed: {e}. Falling back to Context/Regex...")
-        
-        # 1. Start the new extracted data as a copy of the previous state (Context Persistence Guarantee)
-        newly_extracted_data_for_merge = dict(prev_relevant_data)
-        
-        # 2. Add basic regex for NEW IDs (will overwrite old IDs if new ones are explicitly stated)
-        user_input_lower = user_input.lower()
-        if order_match := re.search(r"\b(?:order|id)\s*(\d+)\b", user_input_lower):
-            newly_extracted_data_for_merge["order_id"] = order_match.group(1)
-            print(f"▶️ Regex found new order_id: {order_match.group(1)}")
-        if product_match := re.search(r"\b(?:product|item)\s*(?:id|number)?\s*(\d+)\b", user_input_lower):
-             newly_extracted_data_for_merge["product_id"] = product_match.group(1)
-             print(f"▶️ Regex found new product_id: {product_match.group(1)}")
-        
-        # 3. CRITICAL: Determine Intent based on available data
-        if newly_extracted_data_for_merge:
-             # If we have any data (new ID or persistent old context), we assume the intent is 'details'
-             intent = "details" 
-        else:
-             # If no data and parsing failed, we default to 'none'
-             intent = "none"
-
-        extracted_data = {
-            "intent": intent,
-            "relevant_data": newly_extracted_data_for_merge
-        }
-
+            extracted_data = regex_extract(user_input, prev_relevant_data)
 
     state["intent"] = extracted_data["intent"]
 
@@ -1,10 +1,148 @@
 import sqlite3
 from typing import Dict, Any, Optional
 from db.config import DB_PATH
+from src.services import capture
+from src.services.single_flight import SingleFlight
+from src.services.catalog import catalog, FACET_COLUMNS
+
+sql_flight = SingleFlight("sql")
+
+PRODUCT_COLUMNS = ["P_ID", "NAME", "PRICE", "COLOUR", "BRAND", "IMG", "DESCRIPTION"]
+PRODUCT_KEYS = ["product_id", "name", "price", "colour", "brand", "img", "description"]
+
+# Full product record (REST API): base columns + facets, ratings and row VERSION
+PRODUCT_DETAIL_COLUMNS = PRODUCT_COLUMNS + [
+    "AVG_RATING", "RATINGCOUNT", "TOP_TYPE", "SLEEVE_LENGTH", "OCCASION",
+    "PRINT_PATTERN", "FABRIC", "HAS_DUPATTA", "IS_SUSTAINABLE", "VERSION"
+]
+PRODUCT_DETAIL_KEYS = PRODUCT_KEYS + [
+    "avg_rating", "rating_count", "top_type", "sleeve_length", "occasion",
+    "print_pattern", "fabric", "has_dupatta", "is_sustainable", "version"
+]
+
+# Fields that decide which row(s) a lookup returns
+LOOKUP_FIELDS = [
+    "order_id", "product_id", "name", "brand", "colour", "fabric",
+    "occasion", "print_pattern", "top_type", "sleeve_length", "description"
+]
+
+def lookup_key(relevant_data: Dict[str, Any], user_id: Optional[int] = None) -> tuple:
+    """
+    Normalized key for a lookup: only the fields the query reads, lowercased and stripped.
+    Only order lookups are filtered by user, so product lookups share one key across users.
+    """
+    fields = tuple(
+        (field, str(val).strip().lower())
+        for field in LOOKUP_FIELDS
+        if (val := relevant_data.get(field))
+    )
+    return (user_id if relevant_data.get("order_id") else None, fields)
+
+ORDER_SELECT = """
+    SELECT
+        o.ORDER_ID, o.PRODUCT_ID, o.USER_ID, o.STATUS, o.ORDER_DATE,
+        o.SHIPPING_DATE, o.DELIVERY_DATE, o.AMOUNT,
+        p.NAME, p.PRICE, p.BRAND, p.COLOUR, p.IMG, p.DESCRIPTION,
+        o.VERSION, p.VERSION
+    FROM ORDERS o
+    JOIN PRODUCTS p ON o.PRODUCT_ID = p.P_ID
+"""
+ORDER_KEYS = [
+    "order_id", "product_id", "user_id", "status", "order_date",
+    "shipping_date", "delivery_date", "amount",
+    "name", "price", "brand", "colour", "img", "description",
+    "version", "product_version"
+]
+
+def fetch_order(cursor, order_id, user_id) -> Optional[Dict[str, Any]]:
+    """
+    Single order joined with its product. Includes the ORDERS and PRODUCTS VERSIONs.
+    """
+    cursor.execute(ORDER_SELECT + " WHERE o.ORDER_ID = ? AND o.USER_ID = ?", (order_id, user_id))
+    row = cursor.fetchone()
+    return dict(zip(ORDER_KEYS, row)) if row else None
+
+def fetch_user_orders(cursor, user_id, limit: Optional[int] = None, order_ids: Optional[list] = None) -> list:
+    """
+    A user's orders joined with their products, newest first.
+    Optionally restricted to `order_ids` and/or capped at `limit` rows.
+    """
+    query, params = ORDER_SELECT + " WHERE o.USER_ID = ?", [user_id]
+    if order_ids:
+        query += f" AND o.ORDER_ID IN ({', '.join('?' * len(order_ids))})"
+        params += list(order_ids)
+    query += " ORDER BY o.ORDER_DATE DESC, o.ORDER_ID DESC"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    cursor.execute(query, params)
+    return [dict(zip(ORDER_KEYS, row)) for row in cursor.fetchall()]
+
+def fetch_product(cursor, product_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Primary-key product lookup. Seeded P_IDs carry a float suffix ("19135002.0"),
+    so the bare id is tried alongside it.
+    """
+    p_id = str(product_id).strip()
+    cursor.execute(
+        f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM PRODUCTS WHERE P_ID IN (?, ?)",
+        (p_id, f"{p_id}.0")
+    )
+    row = cursor.fetchone()
+    return dict(zip(PRODUCT_KEYS, row)) if row else None
+
+def fetch_products(cursor, product_ids: list) -> list:
+    """
+    Full product records for `product_ids`, in the same order (missing ids are skipped).
+    """
+    if not product_ids:
+        return []
+    wanted = [str(p).strip() for p in product_ids]
+    params = [v for p_id in wanted for v in (p_id, f"{p_id}.0")]
+    cursor.execute(
+        f"SELECT {', '.join(PRODUCT_DETAIL_COLUMNS)} FROM PRODUCTS WHERE P_ID IN ({', '.join('?' * len(params))})",
+        params
+    )
+    rows = {}
+    for row in cursor.fetchall():
+        record = dict(zip(PRODUCT_DETAIL_KEYS, row))
+        rows[record["product_id"]] = record
+        rows.setdefault(record["product_id"].removesuffix(".0"), record)
+    return [rows[p_id] for p_id in wanted if p_id in rows]
+
+def product_description(product_id: Any) -> Optional[str]:
+    """
+    A product's DESCRIPTION by primary key. Records (and the client state) leave it
+    out; nodes load it only for the prompt of the turn that needs it.
+    """
+    def lookup():
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            row = fetch_product(conn.cursor(), product_id)
+        except sqlite3.Error as e:
+            print(f"⚠️ Description lookup failed: {e}")
+            return None
+        finally:
+            conn.close()
+        return row.get("description") if row else None
+
+    p_id = str(product_id).strip()
+    return capture.through("sql", f"description:{p_id}", lambda: sql_flight.do(("description", p_id), lookup))
 
 def sql_node(relevant_data: Dict[str, Any], user_id: Optional[int] = None) -> Dict[str, Any]:
     """
     Smart SQL retriever for both orders and products.
+    Concurrent identical lookups share a single query (see SingleFlight).
+    """
+    key = lookup_key(relevant_data, user_id)
+    result = capture.through(
+        "sql", repr(key[1]), lambda: sql_flight.do(key, lambda: _run_lookup(relevant_data, user_id))
+    )
+    # Callers merge into their own state, so hand each one its own copy
+    return dict(result)
+
+def _run_lookup(relevant_data: Dict[str, Any], user_id: Optional[int] = None) -> Dict[str, Any]:
+    """
     Detects whether to fetch by order_id or product fields.
     """
     try:
@@ -16,46 +154,48 @@ def sql_node(relevant_data: Dict[str, Any], user_id: Optional[int] = None) -> Di
 
         # 🧠 1️⃣ ORDER LOOKUP (if order_id exists)
         if order_id:
-            cursor.execute("""
-                SELECT 
-                    o.ORDER_ID, o.PRODUCT_ID, o.USER_ID, o.STATUS, o.ORDER_DATE,
-                    o.SHIPPING_DATE, o.DELIVERY_DATE, o.AMOUNT,
-                    p.NAME, p.PRICE, p.BRAND, p.COLOUR, p.IMG, p.DESCRIPTION
-                FROM ORDERS o
-                JOIN PRODUCTS p ON o.PRODUCT_ID = p.P_ID
-                WHERE o.ORDER_ID = ? AND o.USER_ID = ?
-            """, (order_id, user_id))
-            row = cursor.fetchone()
-
+            row = fetch_order(cursor, order_id, user_id)
             if not row:
                 return {"error": f"No order found for order_id {order_id} and user {user_id}"}
 
-            keys = [
-                "order_id", "product_id", "user_id", "status", "order_date",
-                "shipping_date", "delivery_date", "amount",
-                "name", "price", "brand", "colour", "img", "description"
-            ]
-            return {"type": "order", **dict(zip(keys, row))}
+            row.pop("version")
+            row.pop("product_version")
+            return {"type": "order", **row}
 
-        # 🧠 2️⃣ PRODUCT LOOKUP (fallback or explicit)
-        # Build dynamic search filters
-        filters, params = [], []
+        # 🧠 2️⃣ PRODUCT LOOKUP BY ID (exact primary-key match)
+        if product_id:
+            row = fetch_product(cursor, product_id)
+            if not row:
+                return {"error": f"No product found for product_id {product_id}"}
+            return {"type": "product", **row}
+
+        # 🧠 3️⃣ PRODUCT SEARCH (fallback)
         search_fields = [
-            "product_id", "name", "brand", "colour", "fabric",
+            "name", "brand", "colour", "fabric",
             "occasion", "print_pattern", "top_type", "sleeve_length", "description"
         ]
+        wanted = {field: val for field in search_fields if (val := relevant_data.get(field))}
+        if not wanted:
+            return {"error": "No valid product filters provided."}
 
-        for field in search_fields:
-            if val := relevant_data.get(field):
-                filters.append(f"{field.upper()} LIKE ?")
-                params.append(f"%{val}%")
+        # Facet-only queries are answered from the in-memory catalog (same OR/LIKE semantics)
+        if all(field in FACET_COLUMNS for field in wanted):
+            p_ids = catalog.search(wanted, mode="or", substring=True, k=1)
+            if p_ids is not None:
+                row = fetch_product(cursor, p_ids[0]) if p_ids else None
+                if not row:
+                    return {"error": "No matching product found."}
+                return {"type": "product", **row}
 
-        if not filters:
-            return {"error": "No valid product filters provided."}
+        # Build dynamic search filters
+        filters, params = [], []
+        for field, val in wanted.items():
+            filters.append(f"{field.upper()} LIKE ?")
+            params.append(f"%{val}%")
 
         where_clause = " OR ".join(filters)
         query = f"""
-            SELECT P_ID, NAME, PRICE, COLOUR, BRAND, IMG, DESCRIPTION
+            SELECT {", ".join(PRODUCT_COLUMNS)}
             FROM PRODUCTS
             WHERE {where_clause}
             ORDER BY RANDOM() LIMIT 1
@@ -66,8 +206,7 @@ def sql_node(relevant_data: Dict[str, Any], user_id: Optional[int] = None) -> Di
         if not row:
             return {"error": "No matching product found."}
 
-        keys = ["product_id", "name", "price", "colour", "brand", "img", "description"]
-        return {"type": "product", **dict(zip(keys, row))}
+        return {"type": "product", **dict(zip(PRODUCT_KEYS, row))}
 
     except sqlite3.Error as e:
         return {"error": f"Database error: {e}"}
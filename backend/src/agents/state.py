@@ -0,0 +1,142 @@
+from dataclasses import dataclass, fields
+from typing import Any, ClassVar, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+# What survives between turns (round-tripped through the client): the IDs of the
+# rows being discussed plus what the user asked about. Fetched rows are not
+# copied in; nodes re-read them by ID (order working set / primary-key lookup).
+REF_FIELDS = ("order_id", "product_id")
+QUERY_FIELDS = (
+    "name", "brand", "colour", "fabric", "occasion",
+    "print_pattern", "top_type", "sleeve_length", "description"
+)
+MAX_FIELD_CHARS = 120
+
+# Nodes only read the last few messages; the client keeps the full transcript
+MAX_HISTORY = 12
+MAX_MESSAGE_CHARS = 2000
+
+
+# Fields the router extracts from a message (LLM schema for relevant_data)
+class RelevantData(BaseModel):
+    order_id: str | None = Field(None)
+    product_id: str | None = Field(None)
+    name: str | None = Field(None)
+    brand: str | None = Field(None)
+    colour: str | None = Field(None)
+    fabric: str | None = Field(None)
+    occasion: str | None = Field(None)
+    print_pattern: str | None = Field(None)
+    top_type: str | None = Field(None)
+    sleeve_length: str | None = Field(None)
+    description: str | None = Field(None)
+
+
+# -------------------------------
+# Records (one fetched row, server-side only)
+# -------------------------------
+@dataclass(slots=True)
+class OrderRecord:
+    kind: ClassVar[str] = "order"
+    order_id: int
+    product_id: str
+    status: Optional[str] = None
+    order_date: Optional[str] = None
+    shipping_date: Optional[str] = None
+    delivery_date: Optional[str] = None
+    amount: Optional[float] = None
+    name: Optional[str] = None
+    price: Optional[float] = None
+    brand: Optional[str] = None
+    colour: Optional[str] = None
+    img: Optional[str] = None
+    version: Optional[int] = None
+    product_version: Optional[int] = None
+
+    def refs(self) -> Dict[str, str]:
+        return {"order_id": str(self.order_id), "product_id": str(self.product_id)}
+
+
+@dataclass(slots=True)
+class ProductRecord:
+    kind: ClassVar[str] = "product"
+    product_id: str
+    name: Optional[str] = None
+    price: Optional[float] = None
+    colour: Optional[str] = None
+    brand: Optional[str] = None
+    img: Optional[str] = None
+
+    def refs(self) -> Dict[str, str]:
+        return {"product_id": str(self.product_id)}
+
+
+Record = Union[OrderRecord, ProductRecord]
+
+
+def _from_row(cls, row: Dict[str, Any]):
+    return cls(**{f.name: row[f.name] for f in fields(cls) if f.name in row})
+
+
+def record_from_row(row: Optional[Dict[str, Any]]) -> Optional[Record]:
+    """
+    sql_node / order working set result → typed record (None for errors/empty).
+    Long text such as DESCRIPTION is dropped here.
+    """
+    if not row or "error" in row:
+        return None
+    if row.get("type") == "order" or "status" in row:
+        return _from_row(OrderRecord, row)
+    return _from_row(ProductRecord, row)
+
+
+def record_view(record: Record) -> Dict[str, Any]:
+    """
+    Flat dict of a record's non-empty fields (prompts and templates),
+    in the same shape as sql_node's result.
+    """
+    view = {"type": record.kind}
+    for f in fields(record):
+        val = getattr(record, f.name)
+        if f.name not in ("version", "product_version") and val is not None and str(val).strip() != "":
+            view[f.name] = val
+    return view
+
+
+# -------------------------------
+# Client boundary
+# -------------------------------
+def _clip(text: Any, limit: int) -> str:
+    text = str(text)
+    return text if len(text) <= limit else text[:limit]
+
+
+def compact_relevant_data(relevant_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Keep only ID references and the user's query fields, each capped in length.
+    """
+    compact = {}
+    for key in REF_FIELDS + QUERY_FIELDS:
+        val = relevant_data.get(key)
+        if val is not None and str(val).strip() != "":
+            compact[key] = _clip(val, MAX_FIELD_CHARS).strip()
+    return compact
+
+
+def trim_messages(messages: List[Dict[str, Any]], limit: int = MAX_HISTORY) -> List[Dict[str, str]]:
+    return [
+        {"role": m["role"], "content": _clip(m["content"], MAX_MESSAGE_CHARS)}
+        for m in messages[-limit:]
+    ]
+
+
+def to_client(state: Dict[str, Any], sent: int) -> Dict[str, Any]:
+    """
+    What /chat returns: the messages added this turn (the client already has
+    the rest) and the compact context to send back next turn.
+    """
+    return {
+        "messages": state["messages"][sent:],
+        "relevant_data": compact_relevant_data(state.get("relevant_data", {})),
+    }
@@ -0,0 +1,137 @@
+import re
+from datetime import date, timedelta
+from typing import Dict, Any, Optional
+from src.services import capture
+from src.services.order_summary import get_user_summary
+
+# Questions about the user's orders as a whole (spend, counts, in transit)
+SUMMARY_PATTERN = re.compile(
+    r"\b(spent|spend|spending|how many (?:(?:of )?my |total |past )?(?:orders|purchases)"
+    r"|how many times (?:have|did) i (?:order|buy)|in transit|on (?:its|the|their) way"
+    r"|pending orders?|(?:total|all) (?:my )?orders)\b"
+)
+# "when was my last order" is a summary question; "where is my last order" is
+# about that order's status and goes to details
+LAST_ORDER = re.compile(r"\b(?:last order(?:ed)?|latest order|most recent order)\b")
+ORDER_STATUS = re.compile(r"\b(?:where|status|track\w*|deliver\w*|arriv\w*|ship\w*|dispatch\w*|cancel\w*|return\w*)\b")
+# Naming a specific order/product means a details question instead
+EXPLICIT_ID = re.compile(r"\b(?:order|product|item|id)\s*(?:id|number|no\.?)?\s*#?\d+")
+
+# Any time qualifier. Only calendar months/years can be read from by_month;
+# other periods are refused rather than answered for all time
+MONTH_NAMES = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*"
+PERIOD = re.compile(
+    r"\b(?:(?:this|last|previous|past) (?:week|month|year)|today|yesterday"
+    r"|(?:in|during|since|before|after) (?:" + MONTH_NAMES + r"|\d{4})|" + MONTH_NAMES + r" \d{4})\b"
+)
+CALENDAR_PERIOD = re.compile(r"^(?:(this|last|previous) (month|year)|(?:in|during) (\d{4}))$")
+
+IN_TRANSIT = ("shipped", "out for delivery")
+NOT_SHIPPED = ("ordered", "packed")
+
+
+def is_summary_question(user_input: str) -> bool:
+    text = user_input.lower()
+    if EXPLICIT_ID.search(text):
+        return False
+    if SUMMARY_PATTERN.search(text):
+        return True
+    return bool(LAST_ORDER.search(text)) and not ORDER_STATUS.search(text)
+
+
+def _orders(n: int) -> str:
+    return f"{n} order" if n == 1 else f"{n} orders"
+
+
+def _status_total(summary: Dict[str, Any], statuses: tuple) -> Dict[str, float]:
+    rows = [summary["by_status"].get(s, {"count": 0, "amount": 0}) for s in statuses]
+    return {"count": sum(r["count"] for r in rows), "amount": sum(r["amount"] for r in rows)}
+
+
+def _month_prefix(period: str, today: date) -> Optional[str]:
+    """
+    YYYY-MM / YYYY prefix of the by_month keys a period covers, or None if
+    by_month can't answer it (weeks, days, open ranges, named months).
+    """
+    m = CALENDAR_PERIOD.match(period)
+    if not m:
+        return None
+    which, unit, year = m.groups()
+    if year:
+        return year
+    if unit == "month":
+        month = today if which == "this" else today.replace(day=1) - timedelta(days=1)
+        return month.strftime("%Y-%m")
+    return str(today.year if which == "this" else today.year - 1)
+
+
+def _period_total(summary: Dict[str, Any], prefix: str) -> Dict[str, float]:
+    rows = [r for month, r in summary["by_month"].items() if month.startswith(prefix)]
+    return {"count": sum(r["count"] for r in rows), "amount": sum(r["amount"] for r in rows)}
+
+
+def summary_answer(user_input: str, summary: Optional[Dict[str, Any]], today: Optional[date] = None) -> str:
+    """
+    Templated answer from the user's order aggregates — no LLM involved.
+    """
+    text = user_input.lower()
+    if not summary:
+        return "You haven't placed any orders yet."
+
+    period = PERIOD.search(text)
+    period = period.group(0) if period else None
+    prefix = _month_prefix(period, today or date.today()) if period else None
+    unsupported = (f"I can only total your orders by calendar month or year (e.g. \"this month\", "
+                   f"\"last year\", \"in 2025\"), not for \"{period}\".")
+
+    if re.search(r"\bspen[dt]|spending|how much", text):
+        if period and not prefix:
+            return unsupported
+        row = _period_total(summary, prefix) if period else \
+            {"count": summary["order_count"], "amount": summary["total_amount"]}
+        return f"You've spent ₹{row['amount']:,.0f} {period or 'in total'} across {_orders(row['count'])}."
+
+    status_question = re.search(r"transit|on (?:its|the|their) way|pending|not (?:yet )?shipped|delivered", text)
+    if period and status_question:
+        return f"I can only count your orders by status across all time, not for \"{period}\"."
+    if period and not re.search(r"last order|latest order|most recent order", text):
+        if not prefix:
+            return unsupported
+        row = _period_total(summary, prefix)
+        return f"You placed {_orders(row['count'])} {period}, totalling ₹{row['amount']:,.0f}."
+
+    if "transit" in text or "on its way" in text or "on the way" in text or "on their way" in text:
+        row = _status_total(summary, IN_TRANSIT)
+        return f"{_orders(row['count'])} {'is' if row['count'] == 1 else 'are'} in transit (shipped or out for delivery)."
+
+    if "pending" in text or "not shipped" in text or "not yet shipped" in text:
+        row = _status_total(summary, NOT_SHIPPED)
+        return f"{_orders(row['count'])} {'has' if row['count'] == 1 else 'have'} not shipped yet."
+
+    if "delivered" in text:
+        row = summary["by_status"].get("delivered", {"count": 0})
+        return f"{_orders(row['count'])} {'has' if row['count'] == 1 else 'have'} been delivered."
+
+    if re.search(r"last order|latest order|most recent order", text):
+        return f"Your most recent order was placed on {summary['last_order_date']}."
+
+    breakdown = ", ".join(f"{r['count']} {s}" for s, r in sorted(summary["by_status"].items()))
+    return (f"You have {_orders(summary['order_count'])} totalling ₹{summary['total_amount']:,.0f} "
+            f"({breakdown}). Your last order was on {summary['last_order_date']}.")
+
+
+def summary_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Answers account-level order questions from the USER_ORDER_* aggregates.
+    """
+    if "messages" not in state:
+        state["messages"] = []
+
+    user_id = state.get("user_id")
+    summary = capture.through("sql", "order_summary", lambda: get_user_summary(user_id))
+    answer = summary_answer(state.get("latest_input", ""), summary)
+    print(f"📊 Order summary answer for user {user_id}: {answer}")
+
+    state["messages"].append({"role": "viewer_agent", "content": answer})
+    state["error_msg"] = None
+    return state
@@ -1,11 +1,43 @@
 # src/agents/viewer_node.py
 
-from langchain_ollama.chat_models import ChatOllama
+from src.services import llm, budget
 from typing import Dict, Any
-from src.agents.sql_node import sql_node 
+from src.agents.sql_node import sql_node, product_description
+from src.services.order_cache import order_working_set
+from src.services.image_cache import image_url
+from src.agents.state import record_from_row, record_view
+from src.agents import prompts
+from src.agents.prompts import format_record, needs_description, with_description
 import re 
 
-ollama_model = ChatOllama(model="gemma:2b")
+ollama_model = llm.chat_model()
+
+# (keywords in the user's question, field, answer template) — first match wins
+FIELD_TEMPLATES = [
+    (("deliver",), "delivery_date", "The estimated delivery date is {delivery_date}."),
+    (("ship",), "shipping_date", "Your order ships on {shipping_date}."),
+    (("order date", "ordered on", "when did i order"), "order_date", "You placed this order on {order_date}."),
+    (("status", "where is", "track"), "status", "Your order is currently {status}."),
+    (("amount", "paid", "total", "cost"), "amount", "You paid ₹{amount} for this order."),
+    (("price",), "price", "The price is ₹{price}."),
+    (("brand",), "brand", "It's by {brand}."),
+    (("colour", "color"), "colour", "The colour is {colour}."),
+    (("name", "which product", "what product"), "name", "The product is {name}."),
+]
+
+def template_answer(user_input: str, relevant_data: Dict[str, Any]) -> str:
+    """
+    LLM-free answer for the requested field (used when the request budget is low).
+    """
+    for keywords, field, template in FIELD_TEMPLATES:
+        if field in relevant_data and any(k in user_input for k in keywords):
+            return template.format(**relevant_data)
+    if relevant_data.get("type") == "order" and "status" in relevant_data:
+        return (f"Order {relevant_data.get('order_id')} ({relevant_data.get('name', 'your item')}) is "
+                f"{relevant_data['status']}; estimated delivery {relevant_data.get('delivery_date')}.")
+    if "name" in relevant_data:
+        return f"{relevant_data['name']} by {relevant_data.get('brand', 'unknown brand')}, priced at ₹{relevant_data.get('price')}."
+    return "Here is what I found: " + ", ".join(f"{k}: {v}" for k, v in relevant_data.items() if k != "description")
 
 def viewer_node(state: Dict[str, Any]) -> Dict[str, Any]:
     if "messages" not in state:
@@ -21,64 +53,59 @@ def viewer_node(state: Dict[str, Any]) -> Dict[str, Any]:
         state["messages"].append({"role": "viewer_agent", "content": msg})
         return state
 
-    # Check if necessary data is already in state (Data Reuse)
-    needs_sql = not any(field in relevant_data for field in ['status', 'delivery_date', 'shipping_date', 'img', 'price'])
-    
-    sql_result = {}
-    if needs_sql:
-        # Run SQL lookup (will only fetch if needed)
+    if relevant_data.get('order_id'):
+        # Orders come from the per-user working set (revalidated by row version)
+        sql_result = order_working_set.get(user_id, relevant_data['order_id']) or sql_node(relevant_data, user_id)
+    else:
+        # Products are a primary-key lookup once the ID is known
         sql_result = sql_node(relevant_data, user_id)
-        # ... (error handling remains the same)
-        if "error" in sql_result:
-            state["messages"].append({"role": "viewer_agent", "content": f"⚠️ {sql_result['error']}"})
-            state["error_msg"] = sql_result["error"]
-            return state
-
-    # --- Merge SQL result into relevant data (Update State) ---
-    for key, val in sql_result.items():
-        if val is not None and str(val).strip() != "":
-            relevant_data[key] = val
-            
-    state["relevant_data"] = relevant_data 
+
+    if "error" in sql_result:
+        state["messages"].append({"role": "viewer_agent", "content": f"⚠️ {sql_result['error']}"})
+        state["error_msg"] = sql_result["error"]
+        return state
+
+    # --- Keep the row as a typed record; only its IDs go into the context ---
+    record = record_from_row(sql_result)
+    relevant_data.update(record.refs())
+    state["relevant_data"] = relevant_data
+    state["record"] = record
+    view = {**relevant_data, **record_view(record)}
 
     # --- Generate Natural Response ---
     
     # 1. SPECIAL CASE: Image Request 
-    if ('image' in user_input or 'img' in user_input) and 'img' in relevant_data:
-        img_url = relevant_data['img']
-        # ONLY return the image URL
-        response_content = img_url 
+    if ('image' in user_input or 'img' in user_input) and record.img:
+        # ONLY return the image URL (through the backend's caching proxy)
+        response_content = image_url(record.product_id, record.img)
         state["messages"].append({"role": "viewer_agent", "content": response_content})
         state["error_msg"] = None
         return state
     
-    # 2. General Query Response (Use LLM with full context)
-    relevant_data_text = "\n".join([f"{k}: {v}" for k, v in relevant_data.items()]) 
-    
-    viewing_prompt = f"""
-    The user asked: "{state.get('latest_input', '')}"
-
-    Full Available Context (Use ONLY this information to construct your response):
-    {relevant_data_text}
-
-    Task: Respond concisely and naturally based ONLY on the user's latest query. 
-    
-    RULES:
-    1. **Conciseness:** Provide the specific requested value (e.g., status, date, price) in one or two short, natural sentences.
-    2. **Anti-Hallucination:** DO NOT mention any fields that the user did not ask for. DO NOT state that data is unavailable if it is present in the context above.
-    3. **Focus:** If the user asks for 'status', give the status. If they ask for 'delivery date', give the delivery date.
-
-    Example: 
-    User: "what is the order status"
-    Response: "Your order is currently {relevant_data.get('status')}."
-
-    Example:
-    User: "what is the delivery date"
-    Response: "The estimated delivery date is {relevant_data.get('delivery_date')}."
-    """
+    # 2. Out of time for an LLM call: answer from a template
+    if not budget.allows(state, "viewer"):
+        state["messages"].append({"role": "viewer_agent", "content": template_answer(user_input, view)})
+        state["error_msg"] = None
+        return state
 
-    llm_response = ollama_model.invoke(viewing_prompt)
-    state["messages"].append({"role": "viewer_agent", "content": llm_response.content})
+    # 3. General Query Response (Use LLM with the record; DESCRIPTION only when asked about)
+    description = None
+    if needs_description(user_input):
+        description = sql_result.get("description") or product_description(record.product_id)
+    viewing_prompt = prompts.render(
+        "viewer", context=format_record(with_description(view, description)), user_input=state.get("latest_input", "")
+    )
+
+    try:
+        content = llm.invoke(
+            ollama_model, viewing_prompt, max_tokens=budget.token_cap(state), name="viewer",
+            wait_s=budget.wait_s(state)
+        ).content
+    except TimeoutError:
+        # Identical generation still running past our deadline
+        budget.degrade(state, "viewer")
+        content = template_answer(user_input, view)
+    state["messages"].append({"role": "viewer_agent", "content": content})
     state["error_msg"] = None
 
     return state
@@ -1,3 +1,4 @@
+import os
 from langgraph.graph import StateGraph, START, END
 from typing_extensions import TypedDict
 from typing import Annotated, Optional, Dict, Any
@@ -7,11 +8,21 @@ from src.agents.router_node import router_node
 from src.agents.viewer_node import viewer_node
 from src.agents.error_node import error_node
 from src.agents.none_node import none_node
+from src.agents.fused_node import fused_node
+from src.agents.summary_node import summary_node
+from src.services import capture
+
+# "two_call": router → viewer (default)
+# "fused":    one route-and-answer generation when the record is known, else two_call
+WORKFLOW_MODE = os.getenv("WORKFLOW_MODE", "two_call")
+WORKFLOW_MODES = ("two_call", "fused")
 
 
 # -------------------------------
 # Define shared State type
 # -------------------------------
+# Between turns only `messages` (capped) and `relevant_data` (IDs + query
+# fields) round-trip through the client; see agents/state.py.
 class State(TypedDict):
     messages: list
     latest_input: str
@@ -19,37 +30,23 @@ class State(TypedDict):
     user_id: int
     relevant_data: Dict[str, Any]
     error_msg: Optional[str]
+    deadline: Optional[float]  # time.monotonic() deadline for this turn (see services.budget)
+    fused: Optional[bool]      # set by the fused node: True if it already answered
+    record: Optional[Any]      # OrderRecord / ProductRecord fetched this turn (never sent to the client)
 
 
-# -------------------------------
-# Build graph
-# -------------------------------
-workflow = StateGraph(State)
-
-# Add all nodes
-workflow.add_node("router", router_node)
-workflow.add_node("Viewer", viewer_node)
-workflow.add_node("ErrorHandler", error_node)
-workflow.add_node("NoneHandler", none_node)
-
-# Edges for basic flow
-workflow.add_edge(START, "router")
-
 # Conditional routing based on intent
 def router_selector(state: State):
     intent = state.get("intent")
     if intent == "details":
         return "Viewer"
+    elif intent == "order_summary":
+        return "Summary"
     elif intent == "none":
         return "NoneHandler"
     else:
         return "NoneHandler"  # fallback
 
-workflow.add_conditional_edges(
-    "router",
-    router_selector
-)
-
 # From viewer → error handler if something went wrong
 def viewer_outcome(state: State):
     if state.get("error_msg"):
@@ -57,15 +54,56 @@ def viewer_outcome(state: State):
     else:
         return END
 
-workflow.add_conditional_edges(
-    "Viewer",
-    viewer_outcome
-)
+# From fused → done, or fall back to the two-call graph
+def fused_outcome(state: State):
+    if state.get("fused"):
+        return END
+    else:
+        return "router"
+
+
+# -------------------------------
+# Build graph
+# -------------------------------
+def build_workflow(mode: str = WORKFLOW_MODE):
+    if mode not in WORKFLOW_MODES:
+        raise ValueError(f"WORKFLOW_MODE must be one of {WORKFLOW_MODES}, got {mode!r}")
+
+    graph = StateGraph(State)
+
+    # Add all nodes (traced: entry/exit is recorded when traffic capture is on)
+    graph.add_node("router", capture.traced("router", router_node))
+    graph.add_node("Viewer", capture.traced("Viewer", viewer_node))
+    graph.add_node("ErrorHandler", capture.traced("ErrorHandler", error_node))
+    graph.add_node("NoneHandler", capture.traced("NoneHandler", none_node))
+    graph.add_node("Summary", capture.traced("Summary", summary_node))
+
+    # Edges for basic flow
+    if mode == "fused":
+        graph.add_node("Fused", capture.traced("Fused", fused_node))
+        graph.add_edge(START, "Fused")
+        graph.add_conditional_edges("Fused", fused_outcome)
+    else:
+        graph.add_edge(START, "router")
+
+    graph.add_conditional_edges(
+        "router",
+        router_selector
+    )
+
+    graph.add_conditional_edges(
+        "Viewer",
+        viewer_outcome
+    )
+
+    # From error, none or summary → END
+    graph.add_edge("ErrorHandler", END)
+    graph.add_edge("NoneHandler", END)
+    graph.add_edge("Summary", END)
+
+    return graph.compile()
 
-# From error or none → END
-workflow.add_edge("ErrorHandler", END)
-workflow.add_edge("NoneHandler", END)
 
-workflow = workflow.compile()
+workflow = build_workflow(WORKFLOW_MODE)
 
-print("✅ Workflow compiled successfully.")
+print(f"✅ Workflow compiled successfully ({WORKFLOW_MODE}).")
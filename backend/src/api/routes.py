@@ -1,11 +1,223 @@
-from fastapi import APIRouter
-from agents.viewer_agent import get_viewer_agent
+import gzip
+import hashlib
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
 
-router = APIRouter()
-agent = get_viewer_agent()
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel
 
-@router.get("/query")
-def query_db(q: str):
-    """Query the DB using natural language"""
-    result = agent.invoke(q)
-    return {"query": q, "result": result["output"]}
\ No newline at end of file
+from db.config import DB_PATH
+from src.services import metrics
+from src.services.catalog import catalog, SORT_KEYS
+from src.agents.sql_node import (
+    ORDER_KEYS, PRODUCT_DETAIL_KEYS, fetch_order, fetch_user_orders, fetch_products
+)
+
+# Structured read API: same data access as sql_node, no LLM in the path
+router = APIRouter(tags=["data"])
+
+GZIP_MIN_BYTES = 1024
+MAX_USER_ORDERS = 500
+MAX_SEARCH_RESULTS = 100
+
+# -------------------------------
+# Schemas (documentation; `fields=` may return a subset)
+# -------------------------------
+class Order(BaseModel):
+    order_id: int
+    product_id: str
+    user_id: int
+    status: Optional[str] = None
+    order_date: Optional[str] = None
+    shipping_date: Optional[str] = None
+    delivery_date: Optional[str] = None
+    amount: float
+    name: Optional[str] = None
+    price: Optional[float] = None
+    brand: Optional[str] = None
+    colour: Optional[str] = None
+    img: Optional[str] = None
+    description: Optional[str] = None
+    version: int
+    product_version: int
+
+class Product(BaseModel):
+    product_id: str
+    name: str
+    price: float
+    colour: Optional[str] = None
+    brand: Optional[str] = None
+    img: Optional[str] = None
+    description: Optional[str] = None
+    avg_rating: Optional[float] = None
+    rating_count: Optional[int] = None
+    top_type: Optional[str] = None
+    sleeve_length: Optional[str] = None
+    occasion: Optional[str] = None
+    print_pattern: Optional[str] = None
+    fabric: Optional[str] = None
+    has_dupatta: Optional[int] = None
+    is_sustainable: Optional[int] = None
+    version: int
+
+class OrderList(BaseModel):
+    user_id: int
+    count: int
+    orders: List[Order]
+
+class ProductList(BaseModel):
+    count: int
+    products: List[Product]
+
+# -------------------------------
+# Helpers
+# -------------------------------
+def _select_fields(fields: Optional[str], allowed: List[str]) -> Optional[List[str]]:
+    """
+    Parse `fields=a,b,c` into a validated key list (None = every field).
+    """
+    if not fields:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}; choose from {allowed}")
+    return selected
+
+def _project(row: Dict[str, Any], selected: Optional[List[str]]) -> Dict[str, Any]:
+    return row if selected is None else {f: row[f] for f in selected}
+
+def _etag(request: Request, versions: List[tuple]) -> str:
+    """
+    Weak ETag from the rows' (id, VERSION...) tuples plus the query string, so it
+    changes whenever any returned row changes or a different view is asked for.
+    Orders include the joined product's VERSION (name, price, img come from it).
+    Computed before serializing, so a matching poll costs one indexed query.
+    """
+    digest = hashlib.sha1(repr((str(request.url.query), versions)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+def _respond(request: Request, payload: Any, etag: str, name: str) -> Response:
+    """
+    JSON response with ETag/304 handling and gzip for large bodies.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if _not_modified(request, etag):
+        metrics.incr(f"api.{name}.not_modified")
+        return Response(status_code=304, headers=headers)
+
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+        metrics.incr(f"api.{name}.gzipped")
+    metrics.incr(f"api.{name}.ok")
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _query(fn, *args, **kwargs):
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return fn(conn.cursor(), *args, **kwargs)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    finally:
+        conn.close()
+
+# -------------------------------
+# Routes
+# -------------------------------
+@router.get("/orders/{order_id}", response_model=Order)
+def get_order(
+    order_id: int,
+    request: Request,
+    user_id: int = Query(..., description="Owner of the order"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields"),
+):
+    selected = _select_fields(fields, ORDER_KEYS)
+    order = _query(fetch_order, order_id, user_id)
+    if not order:
+        raise HTTPException(status_code=404, detail=f"No order {order_id} for user {user_id}")
+    etag = _etag(request, [(order["order_id"], order["version"], order["product_version"])])
+    return _respond(request, _project(order, selected), etag, "order")
+
+@router.get("/users/{user_id}/orders", response_model=OrderList)
+def list_user_orders(
+    user_id: int,
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_USER_ORDERS),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields"),
+):
+    selected = _select_fields(fields, ORDER_KEYS)
+    orders = _query(fetch_user_orders, user_id, limit=limit)
+    etag = _etag(request, [(o["order_id"], o["version"], o["product_version"]) for o in orders])
+    payload = {"user_id": user_id, "count": len(orders), "orders": [_project(o, selected) for o in orders]}
+    return _respond(request, payload, etag, "user_orders")
+
+@router.get("/products/search", response_model=ProductList)
+def search_products(
+    request: Request,
+    colour: Optional[List[str]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    fabric: Optional[List[str]] = Query(None),
+    occasion: Optional[List[str]] = Query(None),
+    print_pattern: Optional[List[str]] = Query(None),
+    top_type: Optional[List[str]] = Query(None),
+    sleeve_length: Optional[List[str]] = Query(None),
+    has_dupatta: Optional[bool] = None,
+    is_sustainable: Optional[bool] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    mode: str = Query("and", pattern="^(and|or)$", description="How different facets combine"),
+    sort_by: str = Query("avg_rating", description=f"One of {list(SORT_KEYS)}"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields"),
+):
+    """
+    Facet search over the in-memory catalog index. Repeat a facet to OR its
+    values (?colour=red&colour=pink); results are full product records.
+    """
+    if sort_by not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {list(SORT_KEYS)}")
+    selected = _select_fields(fields, PRODUCT_DETAIL_KEYS)
+
+    facets: Dict[str, Any] = {
+        field: values for field, values in (
+            ("colour", colour), ("brand", brand), ("fabric", fabric), ("occasion", occasion),
+            ("print_pattern", print_pattern), ("top_type", top_type), ("sleeve_length", sleeve_length),
+        ) if values
+    }
+    for field, flag in (("has_dupatta", has_dupatta), ("is_sustainable", is_sustainable)):
+        if flag is not None:
+            facets[field] = int(flag)
+
+    p_ids = catalog.search(
+        facets, mode=mode, price_min=price_min, price_max=price_max, k=limit, sort_by=sort_by
+    )
+    if p_ids is None:
+        raise HTTPException(status_code=503, detail="Catalog index not loaded")
+    products = _query(fetch_products, p_ids)
+    etag = _etag(request, [(p["product_id"], p["version"]) for p in products])
+    payload = {"count": len(products), "products": [_project(p, selected) for p in products]}
+    return _respond(request, payload, etag, "product_search")
+
+@router.get("/products/{p_id}", response_model=Product)
+def get_product(
+    p_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields"),
+):
+    selected = _select_fields(fields, PRODUCT_DETAIL_KEYS)
+    products = _query(fetch_products, [p_id])
+    if not products:
+        raise HTTPException(status_code=404, detail=f"No product {p_id}")
+    product = products[0]
+    etag = _etag(request, [(product["product_id"], product["version"])])
+    return _respond(request, _project(product, selected), etag, "product")
@@ -1,16 +1,27 @@
 import sqlite3
 import hashlib
-import os
-from fastapi import FastAPI
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any # ADDED Dict, Any
-from src.agents.workflow import workflow
+from typing import List, Dict, Any, Optional # ADDED Dict, Any
+from src.agents.workflow import workflow, WORKFLOW_MODE
+from src.services import metrics, budget, capture
+from src.services.catalog import catalog
+from src.services.order_cache import order_working_set
+from src.services.image_cache import get_image_cache, image_version, VARIANTS
+from src.agents.sql_node import fetch_product
+from src.agents.state import compact_relevant_data, trim_messages, to_client
+from src.api.routes import router as data_router
 
 # DB path (adjust according to your folder structure)
-DB_PATH = os.path.abspath("data/fashion_ai.db") 
+from db.config import DB_PATH
+from db.migrate import migrate
 
 app = FastAPI(title="Fashion AI Backend")
 
+# LLM-free read API: /orders/{id}, /users/{id}/orders, /products/{p_id}, /products/search
+app.include_router(data_router)
+
 # -------------------------------
 # Schemas
 # -------------------------------
@@ -22,10 +33,11 @@ class StateRequest(BaseModel):
     messages: List[Message]
     user_id: int
     relevant_data: Dict[str, Any] = {} # FIX 1: Accept incoming relevant_data
+    budget_ms: Optional[int] = None    # Latency budget for this turn (default CHAT_BUDGET_MS)
 
 class StateResponse(BaseModel):
-    messages: List[Message]
-    relevant_data: Dict[str, Any]      # FIX 2: Return updated relevant_data
+    messages: List[Message]            # Only the replies added this turn (client keeps the transcript)
+    relevant_data: Dict[str, Any]      # FIX 2: Return updated relevant_data (IDs + query fields only)
 
 class LoginRequest(BaseModel):
     username_or_email: str
@@ -36,6 +48,24 @@ class LoginResponse(BaseModel):
     msg: str
     user_id: int = None
 
+@app.middleware("http")
+async def capture_middleware(request: Request, call_next):
+    """
+    Opt-in traffic capture (CAPTURE_PATH): every /chat turn, with its node
+    transitions, SQL results and LLM responses, is appended to the log.
+    """
+    if not capture.enabled() or request.url.path != "/chat":
+        return await call_next(request)
+    with capture.turn():
+        return await call_next(request)
+
+@app.on_event("startup")
+def load_catalog():
+    # Add columns/tables/triggers newer than the database (no-op once up to date)
+    migrate()
+    # Column/bitmap index for facet queries; reloads itself when PRODUCTS is reseeded
+    catalog.load()
+
 # -------------------------------
 # Routes
 # -------------------------------
@@ -43,8 +73,22 @@ class LoginResponse(BaseModel):
 async def root():
     return {"msg": "Fashion AI Backend is running 🚀"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Process counters, e.g. singleflight.<name>.collapsed, degraded.<tier>, order_cache.hits
+    """
+    return metrics.snapshot()
+
+@app.get("/metrics/order-cache")
+async def get_order_cache_metrics():
+    """
+    Per-session (user) hit rate and DB queries saved by the order working set
+    """
+    return order_working_set.session_stats()
+
 @app.post("/login", response_model=LoginResponse)
-async def login(req: LoginRequest):
+async def login(req: LoginRequest, background_tasks: BackgroundTasks):
     """
     Check username OR email against stored hashed password.
     """
@@ -64,6 +108,8 @@ async def login(req: LoginRequest):
         input_hash = hashlib.sha256(req.password.encode("utf-8")).hexdigest()
 
         if input_hash == stored_hash:
+            # Warm the user's order working set after the response is sent
+            background_tasks.add_task(order_working_set.prefetch, user_id)
             return {"success": True, "msg": "Login successful", "user_id": user_id}
         else:
             return {"success": False, "msg": "Incorrect password"}
@@ -76,18 +122,60 @@ async def chat_endpoint(req: StateRequest):
     Post conversation messages to LangGraph workflow and return updated messages.
     """
     state = {
-        "messages": [m.dict() for m in req.messages],
+        "messages": trim_messages([m.dict() for m in req.messages]),  # Bounded history
         "user_id": req.user_id,
-        "relevant_data": req.relevant_data # FIX 3: Pass incoming relevant_data to LangGraph state
+        "relevant_data": compact_relevant_data(req.relevant_data), # FIX 3: Pass incoming relevant_data to LangGraph state
+        "deadline": budget.start(req.budget_ms)  # Every node sees the remaining time
     }
     user_messages = [m for m in req.messages if m.role == "user"]
     state["latest_input"] = user_messages[-1].content if user_messages else ""
     
-    updated_state = workflow.invoke(state)
+    # Async path: nodes run on executor threads, so identical concurrent
+    # lookups/generations can be coalesced instead of blocking the event loop
+    capture.record(
+        "request", mode=WORKFLOW_MODE, user=capture.anonymize_user(req.user_id), budget_ms=req.budget_ms,
+        messages=state["messages"], relevant_data=state["relevant_data"], latest_input=state["latest_input"]
+    )
+    sent = len(state["messages"])
+    updated_state = await workflow.ainvoke(state)
+    budget.finish(updated_state)
+    reply = to_client(updated_state, sent)
+    capture.record(
+        "response", intent=updated_state.get("intent"), relevant_data=reply["relevant_data"],
+        new_messages=reply["messages"]
+    )
     
-    # FIX 4: Return the final state, including the fully updated relevant_data
-    return {
-        "messages": [Message(**m) for m in updated_state["messages"]],
-        "relevant_data": updated_state.get("relevant_data", {}) 
-    }
+    # FIX 4: Return the new replies and the compact relevant_data for the next turn
+    return reply
+
+@app.get("/images/{p_id}")
+def product_image(p_id: str, request: Request, size: str = "original", v: Optional[str] = None):
+    """
+    Image proxy: fetches the product's IMG once, then serves it (or a resized
+    variant) from the on-disk cache. Versioned links (`?v=` matching the current
+    IMG, as image_url builds them) are immutable; anything else must revalidate.
+    """
+    if size not in VARIANTS:
+        raise HTTPException(status_code=400, detail=f"size must be one of {list(VARIANTS)}")
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        product = fetch_product(conn.cursor(), p_id)
+    finally:
+        conn.close()
+    if not product or not str(product.get("img") or "").startswith("http"):
+        raise HTTPException(status_code=404, detail="Product image not found")
 
+    try:
+        cached = get_image_cache().get(product["img"], size)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Could not fetch image: {e}")
+
+    versioned = v is not None and v == image_version(product["img"])
+    headers = {
+        "ETag": f'"{cached["digest"]}"',
+        "Cache-Control": "public, max-age=31536000, immutable" if versioned else "no-cache",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(cached["path"], media_type=cached["content_type"], headers=headers)
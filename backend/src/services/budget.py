@@ -0,0 +1,99 @@
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+
+from src.services import metrics
+
+# Default end-to-end budget for one /chat turn
+CHAT_BUDGET_MS = int(os.getenv("CHAT_BUDGET_MS", "8000"))
+
+# Rough decode speed of the local model, used to turn time into a token cap
+TOKENS_PER_SECOND = float(os.getenv("LLM_TOKENS_PER_SECOND", "20"))
+# Time reserved for prompt evaluation / HTTP overhead of each call
+CALL_OVERHEAD_S = 0.5
+MIN_TOKENS = 16
+MAX_TOKENS = 256
+# Caps are rounded down to one of these: the cap is part of the LLM generation
+# key, so identical requests a few ms apart must get the same one (single-flight)
+TOKEN_TIERS = (MIN_TOKENS, 32, 64, 128, MAX_TOKENS)
+
+# Seconds that must remain before a step may call the LLM; below this the
+# step takes its cheap path and the matching degradation tier is counted.
+MIN_REMAINING_S = {
+    "fused": 2.5,    # -> two-call graph (which may degrade further)
+    "router": 2.5,   # -> regex router
+    "viewer": 1.5,   # -> templated field answer
+    "none": 1.0,     # -> canned clarification
+    "error": 1.0,    # -> canned apology
+}
+DEGRADATION_TIERS = {
+    "fused": "fused_skipped",
+    "router": "router_regex",
+    "viewer": "viewer_template",
+    "none": "none_canned",
+    "error": "error_canned",
+}
+
+
+def start(budget_ms: Optional[int] = None) -> float:
+    """
+    Deadline (time.monotonic() based) for a request starting now.
+    """
+    metrics.incr("budget.requests")
+    return time.monotonic() + (budget_ms or CHAT_BUDGET_MS) / 1000
+
+
+def remaining(state: Dict[str, Any]) -> float:
+    """
+    Seconds left for this turn; infinite when no deadline was set.
+    """
+    deadline = state.get("deadline")
+    if deadline is None:
+        return math.inf
+    return deadline - time.monotonic()
+
+
+def allows(state: Dict[str, Any], step: str) -> bool:
+    """
+    True if there's enough time left for `step` to call the LLM. Otherwise the
+    degradation is recorded (metrics "degraded.<tier>") and False is returned.
+    """
+    if remaining(state) >= MIN_REMAINING_S[step]:
+        return True
+    degrade(state, step)
+    return False
+
+
+def degrade(state: Dict[str, Any], step: str) -> None:
+    """
+    Record that `step` takes its cheap path (metrics "degraded.<tier>").
+    """
+    metrics.incr(f"degraded.{DEGRADATION_TIERS[step]}")
+    print(f"⏱️ Budget low ({remaining(state):.2f}s left): {step} → {DEGRADATION_TIERS[step]}")
+
+
+def token_cap(state: Dict[str, Any], limit: int = MAX_TOKENS) -> int:
+    """
+    Max tokens a generation can produce in the remaining time, rounded down
+    to a TOKEN_TIERS step (clamped to `limit`).
+    """
+    left = remaining(state)
+    if math.isinf(left):
+        return limit
+    tokens = int((left - CALL_OVERHEAD_S) * TOKENS_PER_SECOND)
+    return min(limit, max([t for t in TOKEN_TIERS if t <= tokens], default=MIN_TOKENS))
+
+
+def wait_s(state: Dict[str, Any]) -> Optional[float]:
+    """
+    How long a step may wait for an identical generation already in flight
+    (None = no deadline).
+    """
+    left = remaining(state)
+    return None if math.isinf(left) else max(0.0, left)
+
+
+def finish(state: Dict[str, Any]) -> None:
+    if remaining(state) < 0:
+        metrics.incr("budget.overruns")
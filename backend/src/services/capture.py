@@ -0,0 +1,265 @@
+import atexit
+import contextvars
+import functools
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from src.services import metrics
+
+# Opt-in: set CAPTURE_PATH (".jsonl" or ".jsonl.gz") to record /chat traffic
+CAPTURE_PATH = os.getenv("CAPTURE_PATH")
+# Key for pseudonymous user ids. User ids are small integers, so a known key
+# would make them reversible: without CAPTURE_SALT a random one is used and
+# ids only link up within one process lifetime.
+CAPTURE_SALT = os.getenv("CAPTURE_SALT") or secrets.token_hex(16)
+if CAPTURE_PATH and not os.getenv("CAPTURE_SALT"):
+    print("⚠️ CAPTURE_SALT not set: using a random key, user ids won't match across restarts")
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"(?<!\d)\d{10}(?!\d)")
+# "user 12", "user_id=12", "user id: 12" inside text (e.g. SQL error messages)
+_USER_REF = re.compile(r"\b(user(?:[ _]?id)?\s*[:=#]?\s*)(\d+)\b", re.IGNORECASE)
+_USER_KEYS = ("user_id",)
+
+_turn: contextvars.ContextVar[Optional["Turn"]] = contextvars.ContextVar("capture_turn", default=None)
+_replay: contextvars.ContextVar[Optional["ReplaySource"]] = contextvars.ContextVar("capture_replay", default=None)
+_write_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return bool(CAPTURE_PATH)
+
+
+def anonymize_user(user_id: Any) -> str:
+    return hmac.new(CAPTURE_SALT.encode("utf-8"), str(user_id).encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+
+
+def scrub(value: Any) -> Any:
+    """
+    Mask emails and phone-like numbers anywhere in a JSON-able value, and
+    replace user ids (`user_id` keys, "user 12" in text) with anonymize_user.
+    """
+    if isinstance(value, str):
+        value = _USER_REF.sub(lambda m: m.group(1) + anonymize_user(m.group(2)), value)
+        return _PHONE.sub("<phone>", _EMAIL.sub("<email>", value))
+    if isinstance(value, dict):
+        return {
+            k: (anonymize_user(v) if v is not None else None) if k in _USER_KEYS else scrub(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [scrub(v) for v in value]
+    return value
+
+
+class Turn:
+    """
+    Everything one /chat request did, in order. Events are short dicts:
+    {"k": kind, "t": ms since start, "n": current node, ...}
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.node: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, **data) -> None:
+        event = {"k": kind, "t": round((time.perf_counter() - self.started) * 1000, 2)}
+        if self.node:
+            event["n"] = self.node
+        event.update(scrub(data))
+        with self._lock:
+            self.events.append(event)
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"id": self.id, "ts": round(time.time(), 3), "events": self.events}
+
+
+def record(kind: str, **data) -> None:
+    """
+    Add an event to the current turn (no-op when nothing is being captured).
+    """
+    turn = _turn.get()
+    if turn is not None:
+        turn.add(kind, **data)
+
+
+def active() -> bool:
+    return _turn.get() is not None or _replay.get() is not None
+
+
+@contextmanager
+def turn(path: Optional[str] = CAPTURE_PATH):
+    """
+    Capture one request. The Turn is bound to a contextvar, so nodes running on
+    executor threads (copied contexts) append to the same object.
+    """
+    current = Turn()
+    token = _turn.set(current)
+    try:
+        yield current
+    finally:
+        _turn.reset(token)
+        if path:
+            write(current.to_record(), path)
+
+
+class _Writer:
+    """
+    One open file per log, written by a background thread: the request path
+    (async middleware) only enqueues. A .gz log is a single gzip member,
+    sync-flushed after each batch so it can be read while still being written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, line: str) -> None:
+        self._queue.put(line)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "at", encoding="utf-8") as f:
+            while True:
+                # Write everything queued so far, then flush once
+                batch = [self._queue.get()]
+                while batch[-1] is not None and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                for line in batch:
+                    if line is None:
+                        return
+                    f.write(line)
+                f.flush()
+
+
+_writers: Dict[str, _Writer] = {}
+
+
+def write(record_: Dict[str, Any], path: str) -> None:
+    line = json.dumps(record_, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+    with _write_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = _Writer(path)
+    writer.put(line)
+    metrics.incr("capture.turns")
+
+
+@atexit.register
+def close() -> None:
+    """
+    Flush and close every capture log (also runs at interpreter exit).
+    """
+    with _write_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+def read(path: str) -> List[Dict[str, Any]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    records = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+        except EOFError:
+            pass  # Log still being written: the gzip stream isn't closed yet
+    return records
+
+
+def traced(name: str, fn: Callable) -> Callable:
+    """
+    Wrap a workflow node so node entry/exit lands in the captured turn.
+    """
+    @functools.wraps(fn)
+    def wrapper(state):
+        current = _turn.get()
+        if current is None:
+            return fn(state)
+        previous, current.node = current.node, name
+        current.add("enter")
+        start = time.perf_counter()
+        try:
+            return fn(state)
+        finally:
+            current.add("exit", ms=round((time.perf_counter() - start) * 1000, 2))
+            current.node = previous
+    return wrapper
+
+
+# -------------------------------
+# Replay
+# -------------------------------
+class ReplaySource:
+    """
+    Serves recorded results (kinds: "sql", "orders", "llm") back to the code
+    that produced them. Matching is by key first (same lookup / same prompt),
+    then by order of calls within the same node, so prompt changes between
+    builds still replay.
+    """
+
+    def __init__(self, events: List[Dict[str, Any]], kinds=("sql", "orders", "llm")):
+        self.kinds = set(kinds)
+        self._pending = [e for e in events if e["k"] in self.kinds]
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def take(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        node = _turn.get().node if _turn.get() else None
+        with self._lock:
+            for match in (lambda e: e.get("key") == key, lambda e: e.get("n") == node):
+                for i, event in enumerate(self._pending):
+                    if event["k"] == kind and match(event):
+                        return self._pending.pop(i)
+            self.misses += 1
+        return None
+
+
+@contextmanager
+def replaying(source: Optional[ReplaySource]):
+    token = _replay.set(source)
+    try:
+        yield source
+    finally:
+        _replay.reset(token)
+
+
+def through(kind: str, key: str, live: Callable[[], Any],
+            encode: Callable[[Any], Any] = lambda v: v,
+            decode: Callable[[Any], Any] = lambda v: v) -> Any:
+    """
+    Run `live()` and record its (encoded) result — or, while replaying a kind,
+    serve the recorded result instead. Falls through to live() on a miss.
+    """
+    source = _replay.get()
+    if source is not None and kind in source.kinds:
+        event = source.take(kind, key)
+        if event is not None:
+            record(kind, key=key, value=event["value"], replayed=True)
+            return decode(event["value"])
+    value = live()
+    record(kind, key=key, value=encode(value))
+    return value
@@ -0,0 +1,247 @@
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from db.config import DB_PATH
+from src.services import metrics
+
+# relevant_data field -> PRODUCTS column
+FACET_COLUMNS = {
+    "colour": "COLOUR",
+    "brand": "BRAND",
+    "fabric": "FABRIC",
+    "occasion": "OCCASION",
+    "print_pattern": "PRINT_PATTERN",
+    "top_type": "TOP_TYPE",
+    "sleeve_length": "SLEEVE_LENGTH",
+    "has_dupatta": "HAS_DUPATTA",
+    "is_sustainable": "IS_SUSTAINABLE",
+}
+
+# Facets with at most this many distinct values get a precomputed bitmap per value;
+# wider ones (brand, colour) are matched on their code column instead.
+BITMAP_MAX_CARDINALITY = 64
+
+SORT_KEYS = ("avg_rating", "rating_count", "price")
+
+
+class CatalogIndex:
+    """
+    Immutable column store over PRODUCTS.
+
+    Every facet is dictionary-encoded into an int32 code column. Low-cardinality
+    facets also keep one packed bitmap (np.packbits) per value so AND/OR filters
+    are plain bitwise ops over n/8 bytes.
+    """
+
+    def __init__(self, rows: List[tuple]):
+        self.size = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * (4 + len(FACET_COLUMNS))
+
+        self.p_ids = np.array(columns[0], dtype=object)
+        self.price = np.array(columns[1], dtype=np.float32)
+        self.avg_rating = np.array(columns[2], dtype=np.float32)
+        self.rating_count = np.array(columns[3], dtype=np.int32)
+
+        self.values: Dict[str, Dict[str, int]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.bitmaps: Dict[str, List[np.ndarray]] = {}
+
+        for i, field in enumerate(FACET_COLUMNS, start=4):
+            raw = [_normalize(v) for v in columns[i]]
+            vocab: Dict[str, int] = {}
+            codes = np.fromiter((vocab.setdefault(v, len(vocab)) for v in raw), dtype=np.int32, count=self.size)
+            self.values[field] = vocab
+            self.codes[field] = codes
+            if len(vocab) <= BITMAP_MAX_CARDINALITY:
+                self.bitmaps[field] = [np.packbits(codes == code) for code in range(len(vocab))]
+
+    # -------------------------------
+    # Bitmap helpers
+    # -------------------------------
+    def _empty(self) -> np.ndarray:
+        return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _full(self) -> np.ndarray:
+        return np.packbits(np.ones(self.size, dtype=bool))
+
+    def _resolve(self, field: str, wanted: Iterable[Any], substring: bool) -> List[int]:
+        """
+        Map requested values to codes. With substring=True a value matches every
+        facet value containing it (same semantics as LIKE '%val%').
+        """
+        vocab = self.values[field]
+        codes = set()
+        for val in wanted:
+            val = _normalize(val)
+            if not val:
+                continue
+            if substring:
+                codes.update(code for v, code in vocab.items() if val in v)
+            elif val in vocab:
+                codes.add(vocab[val])
+        return sorted(codes)
+
+    def facet_bitmap(self, field: str, wanted: Iterable[Any], substring: bool = False) -> np.ndarray:
+        codes = self._resolve(field, wanted, substring)
+        if not codes:
+            return self._empty()
+        if field in self.bitmaps:
+            bitmap = self._empty()
+            for code in codes:
+                bitmap |= self.bitmaps[field][code]
+            return bitmap
+        return np.packbits(np.isin(self.codes[field], codes))
+
+    # -------------------------------
+    # Query
+    # -------------------------------
+    def filter(
+        self,
+        facets: Dict[str, Any],
+        mode: str = "and",
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        k: int = 10,
+        sort_by: str = "avg_rating",
+        substring: bool = False,
+    ) -> List[str]:
+        """
+        Facet values within one field are OR-ed; fields are combined with `mode`
+        ("and" / "or"). Price bounds always narrow the result. Returns up to k
+        P_IDs ordered by `sort_by` (then rating count) descending.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {SORT_KEYS}")
+
+        bitmap = None
+        for field, wanted in facets.items():
+            if field not in FACET_COLUMNS:
+                raise KeyError(f"Unknown facet: {field}")
+            if isinstance(wanted, (str, int, float)):
+                wanted = [wanted]
+            fb = self.facet_bitmap(field, wanted, substring)
+            if bitmap is None:
+                bitmap = fb
+            elif mode == "or":
+                bitmap = bitmap | fb
+            else:
+                bitmap = bitmap & fb
+
+        mask = np.unpackbits(bitmap if bitmap is not None else self._full(), count=self.size).astype(bool)
+        if price_min is not None:
+            mask &= self.price >= price_min
+        if price_max is not None:
+            mask &= self.price <= price_max
+
+        matched = np.flatnonzero(mask)
+        if matched.size == 0:
+            return []
+
+        primary = getattr(self, sort_by)[matched]
+        order = np.lexsort((-self.rating_count[matched], -primary))[:k]
+        return self.p_ids[matched[order]].tolist()
+
+
+class Catalog:
+    """
+    Holds the current CatalogIndex and swaps it atomically on reload.
+
+    Readers grab `self.index` once per query, so an in-progress rebuild never
+    exposes a half-built index. Reseeds are detected cheaply via
+    `PRAGMA data_version` (any commit) and confirmed with the PRODUCTS
+    change counter, so ORDERS writes don't trigger a rebuild.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.index: Optional[CatalogIndex] = None
+        self._lock = threading.Lock()
+        self._watch_conn: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        self._fingerprint = None
+
+    def _fetch_fingerprint(self, cursor) -> tuple:
+        """
+        PRODUCTS change counter (trigger-maintained, one row). A database that
+        hasn't been migrated (db/migrate.py) falls back to row count and max rowid,
+        which misses in-place updates but needs no newer columns.
+        """
+        try:
+            cursor.execute("SELECT SEQ FROM PRODUCTS_CHANGES WHERE ID = 1")
+        except sqlite3.OperationalError:
+            cursor.execute("SELECT COUNT(*), MAX(rowid) FROM PRODUCTS")
+        return cursor.fetchone()
+
+    def load(self) -> CatalogIndex:
+        columns = ", ".join(["P_ID", "PRICE", "AVG_RATING", "RATINGCOUNT", *FACET_COLUMNS.values()])
+        # data_version first: a commit landing during the read below then shows up
+        # as a new version, and maybe_reload compares it against this snapshot
+        with self._lock:
+            if self._watch_conn is None:
+                self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            data_version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+        # Fingerprint and rows from one read transaction (the same snapshot)
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            fingerprint = self._fetch_fingerprint(cursor)
+            cursor.execute(f"SELECT {columns} FROM PRODUCTS")
+            rows = cursor.fetchall()
+            cursor.execute("COMMIT")
+        finally:
+            conn.close()
+
+        index = CatalogIndex(rows)
+        with self._lock:
+            self.index = index
+            self._fingerprint = fingerprint
+            self._data_version = data_version
+
+        metrics.incr("catalog.reloads")
+        print(f"✅ Catalog loaded: {index.size} products")
+        return index
+
+    def maybe_reload(self) -> None:
+        if self._watch_conn is None:
+            return
+        with self._lock:
+            version = self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return
+            self._data_version = version
+            fingerprint = self._fetch_fingerprint(self._watch_conn.cursor())
+            if fingerprint == self._fingerprint:
+                return
+        print("🔄 PRODUCTS changed, reloading catalog...")
+        self.load()
+
+    def search(self, facets: Dict[str, Any], **kwargs) -> Optional[List[str]]:
+        """
+        Returns matching P_IDs, or None when the catalog hasn't been loaded
+        (callers should fall back to SQL).
+        """
+        try:
+            self.maybe_reload()
+        except sqlite3.Error as e:
+            print(f"⚠️ Catalog reload check failed: {e}")
+        index = self.index
+        if index is None:
+            return None
+        metrics.incr("catalog.queries")
+        return index.filter(facets, **kwargs)
+
+
+def _normalize(val: Any) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, float) and val.is_integer():
+        val = int(val)
+    return str(val).strip().lower()
+
+
+catalog = Catalog()
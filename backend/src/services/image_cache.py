@@ -0,0 +1,197 @@
+import hashlib
+import io
+import os
+import threading
+import urllib.request
+from typing import Callable, Dict, Optional, Tuple
+
+from src.services import metrics
+from src.services.single_flight import SingleFlight
+
+IMAGE_CACHE_DIR = os.path.abspath(os.getenv("IMAGE_CACHE_DIR", "data/image_cache"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Base URL the frontend uses to reach this backend (for links put in chat messages)
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+FETCH_TIMEOUT = 10
+
+# variant name -> max side in pixels ("original" is stored untouched)
+VARIANTS = {"original": None, "thumb": 256, "medium": 640}
+
+
+def image_version(img: str) -> str:
+    """
+    Version tag of a product image: the proxy serves whatever IMG points at,
+    so a new IMG means a new URL (the source URL's bytes are fetched once).
+    """
+    return hashlib.sha256(str(img).encode("utf-8")).hexdigest()[:12]
+
+
+def image_url(p_id: str, img: str, variant: str = "original") -> str:
+    """
+    Versioned proxy URL (`?v=`), safe to cache as immutable.
+    """
+    url = f"{PUBLIC_BASE_URL}/images/{p_id}?v={image_version(img)}"
+    return url if variant == "original" else f"{url}&size={variant}"
+
+
+def fetch_url(url: str) -> Tuple[bytes, str]:
+    req = urllib.request.Request(url, headers={"User-Agent": "fashion-ai-image-proxy"})
+    with urllib.request.urlopen(req, timeout=FETCH_TIMEOUT) as resp:
+        return resp.read(), resp.headers.get_content_type()
+
+
+def make_thumbnail(data: bytes, max_side: int) -> Tuple[bytes, str]:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB")
+        img.thumbnail((max_side, max_side))
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=85, optimize=True)
+    return out.getvalue(), "image/jpeg"
+
+
+class ImageCache:
+    """
+    Content-addressed on-disk image cache.
+
+    blobs/<aa>/<sha256>   image bytes, named by their own hash
+    refs/<sha256(url|variant)>   "<blob digest> <content type>"
+
+    A blob's mtime is its last access time; once the blobs exceed `max_bytes`
+    the least recently used ones are deleted. Refs whose blob was evicted are
+    simply treated as misses.
+    """
+
+    def __init__(
+        self,
+        root: str = IMAGE_CACHE_DIR,
+        max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+        fetch: Callable[[str], Tuple[bytes, str]] = fetch_url,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.fetch = fetch
+        self._blob_dir = os.path.join(root, "blobs")
+        self._ref_dir = os.path.join(root, "refs")
+        os.makedirs(self._blob_dir, exist_ok=True)
+        os.makedirs(self._ref_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._flight = SingleFlight("image")
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    # -------------------------------
+    # Paths
+    # -------------------------------
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def _ref_path(self, url: str, variant: str) -> str:
+        key = hashlib.sha256(f"{url}|{variant}".encode("utf-8")).hexdigest()
+        return os.path.join(self._ref_dir, key)
+
+    def _scan(self):
+        for sub in os.listdir(self._blob_dir):
+            for name in os.listdir(os.path.join(self._blob_dir, sub)):
+                path = os.path.join(self._blob_dir, sub, name)
+                st = os.stat(path)
+                yield path, st.st_size, st.st_mtime
+
+    # -------------------------------
+    # Read / write
+    # -------------------------------
+    def _lookup(self, url: str, variant: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._ref_path(url, variant), "r") as f:
+                digest, content_type = f.read().split()
+            path = self._blob_path(digest)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+        return {"path": path, "digest": digest, "content_type": content_type}
+
+    def _store(self, url: str, variant: str, data: bytes, content_type: str) -> Dict[str, str]:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            if not os.path.exists(path):
+                tmp = f"{path}.tmp{threading.get_ident()}"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                self._total_bytes += len(data)
+            ref = self._ref_path(url, variant)
+            with open(f"{ref}.tmp", "w") as f:
+                f.write(f"{digest} {content_type}")
+            os.replace(f"{ref}.tmp", ref)
+        self._evict(keep=path)
+        return {"path": path, "digest": digest, "content_type": content_type}
+
+    def _evict(self, keep: str) -> None:
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            for path, size, _ in sorted(self._scan(), key=lambda blob: blob[2]):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                os.remove(path)
+                self._total_bytes -= size
+                metrics.incr("images.evicted")
+
+    def get(self, url: str, variant: str = "original") -> Dict[str, str]:
+        """
+        Return {"path", "digest", "content_type"} for the image at `url`,
+        fetching it (once, even under concurrency) and resizing as needed.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown image variant: {variant}")
+
+        cached = self._lookup(url, variant)
+        if cached:
+            metrics.incr(f"images.hits.{variant}")
+            return cached
+        return self._flight.do((url, variant), lambda: self._fill(url, variant))
+
+    def _fill(self, url: str, variant: str) -> Dict[str, str]:
+        cached = self._lookup(url, variant)
+        if cached:
+            return cached
+
+        metrics.incr(f"images.misses.{variant}")
+        if variant == "original":
+            data, content_type = self.fetch(url)
+            metrics.incr("images.origin_fetches")
+            return self._store(url, variant, data, content_type)
+
+        original = self.get(url, "original")
+        with open(original["path"], "rb") as f:
+            data = f.read()
+        try:
+            data, content_type = make_thumbnail(data, VARIANTS[variant])
+        except Exception as e:
+            # Not decodable (or Pillow missing): serve the original bytes
+            print(f"⚠️ Thumbnail failed for {url}: {e}")
+            content_type = original["content_type"]
+        return self._store(url, variant, data, content_type)
+
+    def size_bytes(self) -> int:
+        return self._total_bytes
+
+
+image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """
+    The process-wide cache. /images runs on the threadpool, so the first
+    requests may race here: exactly one ImageCache (size cap, SingleFlight) is built.
+    """
+    global image_cache
+    with _image_cache_lock:
+        if image_cache is None:
+            image_cache = ImageCache()
+        return image_cache
@@ -0,0 +1,85 @@
+import json
+import re
+from typing import Any, Dict, Optional
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class JsonObjectExtractor:
+    """
+    Pulls the first complete top-level JSON object out of streamed LLM text.
+
+    Tolerates what small models wrap around JSON: markdown fences, prose
+    before/after, and trailing commas. Braces inside strings are ignored.
+    `feed()` returns the object as soon as its closing brace arrives, so the
+    caller can stop the generation right there.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self._pos = 0          # next character to scan
+        self._start = -1       # index of the current candidate's opening brace
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        if self.done:
+            return self.result
+        self.text += chunk
+        while self._pos < len(self.text):
+            ch = self.text[self._pos]
+            self._pos += 1
+
+            if self._start < 0:
+                if ch == "{":
+                    self._start, self._depth = self._pos - 1, 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = self.text[self._start:self._pos]
+                    parsed = _loads(candidate)
+                    if isinstance(parsed, dict):
+                        self.result = parsed
+                        return parsed
+                    # Not valid JSON: rescan from just after this candidate's opening brace
+                    self._pos, self._start = self._start + 1, -1
+        return None
+
+
+def _loads(candidate: str) -> Any:
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", candidate))
+    except json.JSONDecodeError:
+        return None
+
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    One-shot helper over a complete string.
+    """
+    return JsonObjectExtractor().feed(text)
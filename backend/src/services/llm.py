@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional, Tuple
+
+from langchain_ollama.chat_models import ChatOllama
+
+from langchain_core.messages import AIMessage
+
+from src.services import capture, metrics
+from src.services.json_stream import JsonObjectExtractor, extract_json
+from src.services.single_flight import SingleFlight
+
+llm_flight = SingleFlight("llm")
+
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "gemma:2b")
+# Keep the model (and its prompt KV cache) loaded between turns; Ollama's default
+# is 5m, after which every static prompt prefix has to be evaluated again
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Model fields that change what the server generates for the same prompt
+_MODEL_PARAMS = ("model", "base_url", "temperature", "top_k", "top_p", "seed", "num_predict", "num_ctx", "format")
+
+
+def chat_model(**kwargs) -> ChatOllama:
+    """
+    The ChatOllama every node uses (same model + keep_alive, so they share the server's cache).
+    """
+    return ChatOllama(**{"model": OLLAMA_MODEL, "keep_alive": KEEP_ALIVE, **kwargs})
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    # List of langchain messages
+    return json.dumps([[m.type, m.content] for m in prompt], ensure_ascii=False)
+
+
+def generation_key(model: ChatOllama, prompt: Any, **kwargs) -> str:
+    """
+    Hash of the prompt plus every model/call parameter that affects the output.
+    """
+    params = {p: getattr(model, p, None) for p in _MODEL_PARAMS}
+    params.update(kwargs)
+    payload = json.dumps({"prompt": _prompt_text(prompt), "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _options(model: ChatOllama, **overrides) -> dict:
+    """
+    Ollama `options` for one call: the model's configured values plus overrides.
+    """
+    options = {
+        "num_ctx": model.num_ctx,
+        "num_predict": model.num_predict,
+        "temperature": model.temperature,
+        "seed": model.seed,
+        "top_k": model.top_k,
+        "top_p": model.top_p,
+        "stop": model.stop,
+    }
+    options.update(overrides)
+    return {k: v for k, v in options.items() if v is not None}
+
+
+def _record_prompt_eval(name: str, ms: float, tokens: Optional[int] = None) -> None:
+    """
+    llm.<name>.prompt_eval_ms / prompt_calls (and prompt_tokens: tokens the
+    server actually evaluated, i.e. not served from its prefix cache).
+    """
+    metrics.incr(f"llm.{name}.prompt_calls")
+    metrics.incr(f"llm.{name}.prompt_eval_ms", ms)
+    if tokens is not None:
+        metrics.incr(f"llm.{name}.prompt_tokens", tokens)
+
+
+def _invoke(model: ChatOllama, prompt: Any, name: str, **kwargs):
+    response = model.invoke(prompt, **kwargs)
+    meta = response.response_metadata or {}
+    if "prompt_eval_duration" in meta:
+        _record_prompt_eval(name, meta["prompt_eval_duration"] / 1e6, meta.get("prompt_eval_count"))
+    return response
+
+
+def invoke(model: ChatOllama, prompt: Any, max_tokens: Optional[int] = None, name: str = "invoke",
+           wait_s: Optional[float] = None, **kwargs):
+    """
+    Drop-in for `model.invoke(prompt)`: identical generations that are already
+    in flight are shared instead of being sent to Ollama again (waiting at most
+    `wait_s` for them, else TimeoutError).
+    `max_tokens` caps generation length (Ollama's num_predict) for this call only.
+    """
+    if max_tokens is not None:
+        kwargs["options"] = _options(model, num_predict=max_tokens)
+    key = generation_key(model, prompt, **kwargs)
+    return capture.through(
+        "llm", key, lambda: llm_flight.do(key, lambda: _invoke(model, prompt, name, **kwargs), timeout=wait_s),
+        encode=lambda msg: {"content": msg.content, "meta": _usage(msg.response_metadata)},
+        decode=lambda v: AIMessage(content=v["content"], response_metadata=v.get("meta") or {}),
+    )
+
+
+def _usage(meta: dict) -> dict:
+    return {k: meta[k] for k in ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration") if k in meta}
+
+
+def _stream_json(model: ChatOllama, prompt: Any, name: str, **kwargs) -> Tuple[Optional[dict], str, int]:
+    extractor = JsonObjectExtractor()
+    tokens = 0
+    start, first = time.perf_counter(), True
+    stream = model.stream(prompt, **kwargs)
+    try:
+        for chunk in stream:
+            if first:
+                # Streams are cut before the final stats chunk; time to first
+                # token is the prompt evaluation (plus one decode step)
+                _record_prompt_eval(name, (time.perf_counter() - start) * 1000)
+                first = False
+            if chunk.content:
+                tokens += 1  # Ollama streams one token per chunk
+            if extractor.feed(chunk.content):
+                # Object complete: stop here so the server stops generating
+                metrics.incr(f"llm.{name}.early_stops")
+                break
+    finally:
+        stream.close()
+    return extractor.result, extractor.text, tokens
+
+
+def stream_json(model: ChatOllama, prompt: Any, name: str, max_tokens: Optional[int] = None,
+                schema: Optional[dict] = None, wait_s: Optional[float] = None,
+                **kwargs) -> Tuple[Optional[dict], str, int]:
+    """
+    Generate a JSON object: constrained by `schema` (Ollama structured outputs),
+    capped at `max_tokens`, parsed incrementally and cut off as soon as the first
+    complete object arrives. Returns (parsed object or None, raw text, tokens).
+    Like invoke, waits at most `wait_s` for an identical call in flight.
+
+    Counts llm.<name>.parse_ok / parse_fail / tokens / wasted_tokens.
+    """
+    if max_tokens is not None:
+        kwargs["options"] = _options(model, num_predict=max_tokens)
+    if schema is not None:
+        kwargs["format"] = schema
+    key = generation_key(model, prompt, stream_json=True, **kwargs)
+    result, text, tokens = capture.through(
+        "llm", key, lambda: llm_flight.do(key, lambda: _stream_json(model, prompt, name, **kwargs), timeout=wait_s),
+        encode=lambda r: {"content": r[1], "tokens": r[2]},
+        decode=lambda v: (extract_json(v["content"]), v["content"], v.get("tokens", 0)),
+    )
+
+    metrics.incr(f"llm.{name}.tokens", tokens)
+    if result is None:
+        metrics.incr(f"llm.{name}.parse_fail")
+        metrics.incr(f"llm.{name}.wasted_tokens", tokens)
+    else:
+        metrics.incr(f"llm.{name}.parse_ok")
+    return result, text, tokens
@@ -0,0 +1,35 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+# -------------------------------
+# Process-wide counters (exposed via GET /metrics)
+# -------------------------------
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+
+
+def incr(name: str, amount: float = 1) -> None:
+    """
+    Increment a named counter. Names are dotted, e.g. "singleflight.sql.collapsed".
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def get(name: str) -> float:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot(prefix: str = "") -> Dict[str, float]:
+    """
+    Return a copy of all counters, optionally filtered by name prefix.
+    """
+    with _lock:
+        return {k: v for k, v in sorted(_counters.items()) if k.startswith(prefix)}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
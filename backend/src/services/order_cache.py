@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from db.config import DB_PATH
+from src.agents.sql_node import fetch_user_orders
+from src.agents.state import OrderRecord, record_from_row, record_view
+from src.services import capture, metrics
+
+RECENT_ORDERS_LIMIT = 50
+MAX_SESSIONS = 1000
+
+
+class _UserOrders:
+    __slots__ = ("orders", "data_version", "lock", "hits", "misses", "validations", "refreshed")
+
+    def __init__(self, data_version: int):
+        self.orders: Dict[str, OrderRecord] = {}
+        # Revalidation (DB reads) for one user never blocks other users
+        self.lock = threading.Lock()
+        self.data_version = data_version
+        self.hits = 0
+        self.misses = 0
+        self.validations = 0
+        self.refreshed = 0
+
+
+class OrderWorkingSet:
+    """
+    Per-user cache of recent orders (joined with product fields), filled at login.
+    Rows are kept as slotted OrderRecords, without the product DESCRIPTION.
+
+    Freshness: `PRAGMA data_version` on a long-lived connection tells us whether
+    anyone committed since the user's set was last validated. Only then do we
+    read the user's (ORDER_ID, VERSION, product VERSION) and re-fetch rows where
+    either moved, so product price/name/img changes are picked up too.
+
+    `_lock` only guards the session map; each user's entry has its own lock.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, limit: int = RECENT_ORDERS_LIMIT):
+        self.db_path = db_path
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[int, _UserOrders]" = OrderedDict()
+        self._watch_lock = threading.Lock()
+        self._watch_conn: Optional[sqlite3.Connection] = None
+
+    def _data_version(self) -> int:
+        with self._watch_lock:
+            if self._watch_conn is None:
+                self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def prefetch(self, user_id: int) -> None:
+        """
+        Load the user's recent orders. Runs as a login background task.
+        """
+        data_version = self._data_version()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = fetch_user_orders(conn.cursor(), user_id, limit=self.limit)
+        except sqlite3.Error as e:
+            print(f"⚠️ Order prefetch failed for user {user_id}: {e}")
+            return
+        finally:
+            conn.close()
+
+        entry = _UserOrders(data_version)
+        entry.orders = {str(row["order_id"]): record_from_row(row) for row in rows}
+        with self._lock:
+            old = self._users.pop(user_id, None)
+            if old is not None:
+                entry.hits, entry.misses = old.hits, old.misses
+                entry.validations, entry.refreshed = old.validations, old.refreshed
+            self._users[user_id] = entry
+            while len(self._users) > MAX_SESSIONS:
+                self._users.popitem(last=False)
+        metrics.incr("order_cache.prefetches")
+        print(f"📦 Prefetched {len(rows)} orders for user {user_id}")
+
+    def _revalidate(self, user_id: int, entry: _UserOrders) -> None:
+        data_version = self._data_version()
+        if data_version == entry.data_version:
+            return
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT o.ORDER_ID, o.VERSION, p.VERSION FROM ORDERS o
+                   JOIN PRODUCTS p ON o.PRODUCT_ID = p.P_ID WHERE o.USER_ID = ?""",
+                (user_id,)
+            )
+            current = {str(order_id): (version, p_version) for order_id, version, p_version in cursor.fetchall()}
+            stale = [
+                oid for oid, record in entry.orders.items()
+                if current.get(oid) != (record.version, record.product_version)
+            ]
+            for oid in stale:
+                del entry.orders[oid]
+            live = [oid for oid in stale if oid in current]
+            if live:
+                for row in fetch_user_orders(cursor, user_id, order_ids=live):
+                    entry.orders[str(row["order_id"])] = record_from_row(row)
+        finally:
+            conn.close()
+
+        entry.data_version = data_version
+        entry.validations += 1
+        entry.refreshed += len(stale)
+        metrics.incr("order_cache.validations")
+        metrics.incr("order_cache.refreshed", len(stale))
+
+    def get(self, user_id: int, order_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached order (sql_node's order result shape, minus DESCRIPTION),
+        or None if it isn't in the user's working set.
+        """
+        return capture.through("orders", str(order_id), lambda: self._get(user_id, order_id))
+
+    def _get(self, user_id: int, order_id: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._users.get(user_id)
+        if entry is None:
+            # Backend restarted or login prefetch still running: load inline once
+            self.prefetch(user_id)
+            with self._lock:
+                entry = self._users.get(user_id)
+            if entry is None:
+                return None
+
+        with self._lock:
+            if user_id in self._users:
+                self._users.move_to_end(user_id)
+        with entry.lock:
+            try:
+                self._revalidate(user_id, entry)
+            except sqlite3.Error as e:
+                print(f"⚠️ Order cache revalidation failed: {e}")
+                entry.misses += 1
+                return None
+            record = entry.orders.get(str(order_id))
+            if record is None:
+                entry.misses += 1
+                metrics.incr("order_cache.misses")
+                return None
+            entry.hits += 1
+
+        metrics.incr("order_cache.hits")
+        return record_view(record)
+
+    def drop(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def session_stats(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Per-user hit rate and DB queries saved. Every hit replaces one
+        ORDERS ⨝ PRODUCTS query; every revalidation costs one cheap query.
+        """
+        stats = {}
+        with self._lock:
+            for user_id, entry in self._users.items():
+                lookups = entry.hits + entry.misses
+                stats[user_id] = {
+                    "orders_cached": len(entry.orders),
+                    "hits": entry.hits,
+                    "misses": entry.misses,
+                    "hit_rate": round(entry.hits / lookups, 3) if lookups else None,
+                    "validations": entry.validations,
+                    "refreshed": entry.refreshed,
+                    "db_queries_saved": entry.hits - entry.validations,
+                }
+        return stats
+
+
+order_working_set = OrderWorkingSet()
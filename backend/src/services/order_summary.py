@@ -0,0 +1,133 @@
+import argparse
+import sqlite3
+import sys
+from typing import Any, Dict, List, Optional
+
+from db.config import DB_PATH
+from src.services import metrics
+
+# Aggregates in db/schema.sql (USER_ORDER_*) are kept current by triggers on
+# ORDERS; this module reads them and checks them against a full recomputation.
+
+# table -> (number of key columns, materialized query, recomputation over ORDERS)
+AGGREGATES = {
+    "USER_ORDER_SUMMARY": (
+        1,
+        "SELECT USER_ID, ORDER_COUNT, TOTAL_AMOUNT, LAST_ORDER_DATE FROM USER_ORDER_SUMMARY",
+        "SELECT USER_ID, COUNT(*), TOTAL(AMOUNT), MAX(ORDER_DATE) FROM ORDERS GROUP BY USER_ID",
+    ),
+    "USER_ORDER_STATUS": (
+        2,
+        "SELECT USER_ID, STATUS, ORDER_COUNT, AMOUNT FROM USER_ORDER_STATUS",
+        "SELECT USER_ID, COALESCE(STATUS, 'unknown'), COUNT(*), TOTAL(AMOUNT) FROM ORDERS GROUP BY 1, 2",
+    ),
+    "USER_ORDER_MONTHLY": (
+        2,
+        "SELECT USER_ID, MONTH, ORDER_COUNT, AMOUNT FROM USER_ORDER_MONTHLY",
+        "SELECT USER_ID, COALESCE(strftime('%Y-%m', ORDER_DATE), 'unknown'), COUNT(*), TOTAL(AMOUNT) "
+        "FROM ORDERS GROUP BY 1, 2",
+    ),
+}
+AMOUNT_TOLERANCE = 0.01
+
+
+def get_user_summary(user_id: int, db_path: str = DB_PATH) -> Optional[Dict[str, Any]]:
+    """
+    A user's order totals, by status and by month. Primary-key reads only,
+    so the cost doesn't grow with ORDERS. None if the user has no orders.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT ORDER_COUNT, TOTAL_AMOUNT, LAST_ORDER_DATE FROM USER_ORDER_SUMMARY WHERE USER_ID = ?", (user_id,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        cursor.execute("SELECT STATUS, ORDER_COUNT, AMOUNT FROM USER_ORDER_STATUS WHERE USER_ID = ?", (user_id,))
+        by_status = {status: {"count": n, "amount": amount} for status, n, amount in cursor.fetchall()}
+        cursor.execute("SELECT MONTH, ORDER_COUNT, AMOUNT FROM USER_ORDER_MONTHLY WHERE USER_ID = ?", (user_id,))
+        by_month = {month: {"count": n, "amount": amount} for month, n, amount in cursor.fetchall()}
+    finally:
+        conn.close()
+
+    metrics.incr("order_summary.reads")
+    return {
+        "user_id": user_id,
+        "order_count": row[0],
+        "total_amount": row[1],
+        "last_order_date": row[2],
+        "by_status": by_status,
+        "by_month": by_month,
+    }
+
+
+def _keyed(cursor, query: str, key_len: int) -> Dict[tuple, tuple]:
+    cursor.execute(query)
+    return {tuple(r[:key_len]): tuple(r[key_len:]) for r in cursor.fetchall()}
+
+
+def _same(a: Optional[tuple], b: Optional[tuple]) -> bool:
+    if a is None or b is None:
+        return a == b
+    count_a, amount_a, *rest_a = a
+    count_b, amount_b, *rest_b = b
+    return count_a == count_b and abs(amount_a - amount_b) <= AMOUNT_TOLERANCE and rest_a == rest_b
+
+
+def check_consistency(db_path: str = DB_PATH) -> List[Dict[str, Any]]:
+    """
+    Recompute every aggregate from ORDERS and return the rows where the
+    materialized tables disagree (empty list = consistent).
+    """
+    conn = sqlite3.connect(db_path)
+    mismatches = []
+    try:
+        cursor = conn.cursor()
+        for table, (key_len, materialized_query, recompute_query) in AGGREGATES.items():
+            stored = _keyed(cursor, materialized_query, key_len)
+            expected = _keyed(cursor, recompute_query, key_len)
+            for key in stored.keys() | expected.keys():
+                if not _same(stored.get(key), expected.get(key)):
+                    mismatches.append({
+                        "table": table, "key": key, "stored": stored.get(key), "expected": expected.get(key)
+                    })
+    finally:
+        conn.close()
+    metrics.incr("order_summary.checks")
+    metrics.incr("order_summary.mismatches", len(mismatches))
+    return mismatches
+
+
+def rebuild(db_path: str = DB_PATH) -> None:
+    """
+    Repopulate the aggregates from ORDERS (databases created before the
+    triggers existed, or repair after a failed check).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            for table, (_, materialized_query, recompute_query) in AGGREGATES.items():
+                columns = materialized_query.split("SELECT ", 1)[1].split(" FROM", 1)[0]
+                conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"INSERT INTO {table} ({columns}) {recompute_query}")
+    finally:
+        conn.close()
+    print("✅ Order summaries rebuilt from ORDERS")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Check (or rebuild) the per-user order aggregates")
+    ap.add_argument("--rebuild", action="store_true")
+    args = ap.parse_args()
+
+    if args.rebuild:
+        rebuild()
+    problems = check_consistency()
+    for problem in problems[:20]:
+        print(f"❌ {problem['table']} {problem['key']}: stored {problem['stored']}, expected {problem['expected']}")
+    if problems:
+        print(f"❌ {len(problems)} aggregate rows out of sync (run with --rebuild)")
+        sys.exit(1)
+    print("✅ Order summaries match a full recomputation")
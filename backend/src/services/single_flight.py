@@ -0,0 +1,67 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.services import metrics
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share the same key into one execution.
+
+    The first caller for a key runs `fn`; callers arriving while it is still
+    in flight block until it finishes (or for at most `timeout` seconds, then
+    TimeoutError) and receive the same result (or error). Nothing is cached
+    once the call completes.
+
+    Workflow nodes are synchronous and LangGraph runs them on executor threads
+    under `workflow.ainvoke`, so the coordination here is thread based.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            metrics.incr(f"singleflight.{self.name}.collapsed")
+            if not call.done.wait(timeout):
+                metrics.incr(f"singleflight.{self.name}.wait_timeouts")
+                raise TimeoutError(f"{self.name} call still in flight after {timeout:.2f}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.incr(f"singleflight.{self.name}.executed")
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -1,8 +1,14 @@
+import statistics
+import time
+
 import streamlit as st
 import requests
-import re
+from client import CHAT_TIMEOUT, parse_new, post
 
-API_URL = "http://127.0.0.1:8000/chat"
+# The backend only reads recent turns (and caps what it keeps); the transcript stays here
+HISTORY_WINDOW = 12
+# Messages rendered per page; older ones appear with "Load older messages"
+RENDER_WINDOW = 20
 
 def show_bot_page():
     st.title("🤖 Fashion AI Bot")
@@ -13,7 +19,10 @@ def show_bot_page():
         "user_id": None,
         "logged_in": False,
         "user_input": "",
-        "relevant_data": {} # FIX 1: Initialize relevant_data state
+        "relevant_data": {}, # FIX 1: Initialize relevant_data state
+        "blocks": [],  # Parsed messages, reused across reruns
+        "shown": RENDER_WINDOW,
+        "latencies": [],  # Send → rendered reply, ms
     }.items():
         if key not in st.session_state:
             st.session_state[key] = default
@@ -24,6 +33,8 @@ def show_bot_page():
         if st.button("🔄 Reset Conversation"):
             st.session_state.messages = []
             st.session_state.relevant_data = {} # FIX 2: Reset relevant_data on conversation reset
+            st.session_state.blocks = []
+            st.session_state.shown = RENDER_WINDOW
             st.success("Conversation reset.")
     with col2:
         if st.button("🚪 Logout"):
@@ -31,44 +42,55 @@ def show_bot_page():
             st.session_state.user_id = None
             st.session_state.messages = []
             st.session_state.relevant_data = {} # Ensure full reset
+            st.session_state.blocks = []
             st.rerun()  # ✅ use st.rerun (new API)
 
     # Chat input
     user_input = st.text_input("💬 You:", key="chat_input", value="", placeholder="Ask about your orders or products...")
+    sent_at = None
     if st.button("Send") and user_input.strip():
+        sent_at = time.perf_counter()
         # Append user message
         st.session_state.messages.append({"role": "user", "content": user_input.strip()})
         try:
             payload = {
-                "messages": st.session_state.messages,
+                "messages": st.session_state.messages[-HISTORY_WINDOW:],
                 "user_id": st.session_state.user_id,
                 "relevant_data": st.session_state.relevant_data # FIX 3: Send current relevant_data
             }
-            resp = requests.post(API_URL, json=payload)
+            resp = post("/chat", payload, timeout=CHAT_TIMEOUT)
             if resp.status_code == 200:
                 data = resp.json()
-                st.session_state.messages = [dict(m) for m in data["messages"]]
+                # Response carries only this turn's replies
+                st.session_state.messages.extend(dict(m) for m in data["messages"])
                 st.session_state.relevant_data = data["relevant_data"] # FIX 4: Store updated relevant_data
             else:
                 st.error("⚠️ Backend error.")
+        except requests.exceptions.Timeout:
+            st.error("⚠️ Backend took too long to answer.")
         except requests.exceptions.RequestException:
             st.error("⚠️ Cannot reach backend.")
+        # No st.rerun(): the history below is drawn after the reply in this same run
+
+    # Display conversation history (only new messages get parsed; last `shown` are drawn)
+    blocks = parse_new(st.session_state.messages, st.session_state.blocks)
+    hidden = len(blocks) - st.session_state.shown
+    if hidden > 0 and st.button(f"⬆️ Load older messages ({hidden} hidden)"):
+        st.session_state.shown += RENDER_WINDOW
+        hidden -= RENDER_WINDOW
+    for block in blocks[max(hidden, 0):]:
+        st.markdown(block["markdown"])
+        # ✅ Render image if URL found in message
+        for url in block["images"]:
+            st.image(url, caption="Product Image", width=250)
 
-        # ✅ Use st.rerun() instead of trying to modify st.session_state.user_input
-        st.rerun()
-
-    # Display conversation history
-    for msg in st.session_state.messages:
-        if msg["role"] == "user":
-            st.markdown(f"🧑 **You:** {msg['content']}")
-        elif msg["role"] == "viewer_agent" and "http" in msg["content"]:
-            # ✅ Render image if URL found in message
-            img_urls = re.findall(r"http[s]?://\S+\.(?:jpg|jpeg|png)", msg["content"])
-            st.markdown(f"🤖 **Bot:** {msg['content']}")
-            for url in img_urls:
-                st.image(url, caption="Product Image", width=250)
-        else:
-            st.markdown(f"🤖 **Bot:** {msg['content']}")
+    if sent_at is not None:
+        # Click → reply handed to the browser (the script run ends right after)
+        latencies = st.session_state.latencies
+        latencies.append((time.perf_counter() - sent_at) * 1000)
+        del latencies[:-50]
+        st.caption(f"⏱️ {latencies[-1]:.0f} ms send → render "
+                   f"(median {statistics.median(latencies):.0f} ms over {len(latencies)} replies)")
 
 
 
@@ -0,0 +1,90 @@
+import os
+import re
+import threading
+from typing import Any, Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BACKEND_URL = os.getenv("FASHION_API_URL", "http://127.0.0.1:8000")
+# (connect, read) seconds: /chat waits on the LLM, /login only on SQLite
+CHAT_TIMEOUT = (3.05, 120)
+LOGIN_TIMEOUT = (3.05, 10)
+
+# Backend proxy links (/images/<p_id>?v=<version>) are served as cached thumbnails.
+# Only this backend's (the host it puts in links, PUBLIC_BASE_URL on the backend):
+# origin CDN URLs have /images/ paths too
+IMAGE_BASE_URL = os.getenv("PUBLIC_BASE_URL", BACKEND_URL).rstrip("/")
+IMAGE_PROXY_URL = re.compile(re.escape(IMAGE_BASE_URL) + r"/images/[\w.]+(?:\?v=\w+)?")
+IMAGE_FILE_URL = re.compile(r"http[s]?://\S+\.(?:jpg|jpeg|png)")
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def make_session() -> requests.Session:
+    """
+    Pooled keep-alive session. Refused connections are retried with backoff
+    (nothing reached the backend). 502/503/504 are retried only for GET and
+    /login: a gateway error on /chat may mean a generation is still running,
+    and resending would start a second one. Read timeouts are never retried.
+    """
+    def adapter(status_methods):
+        retry = Retry(
+            total=2, connect=2, read=0, status=2, backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=status_methods,
+            raise_on_status=False,
+        )
+        return HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter(frozenset({"GET"})))
+    session.mount("https://", adapter(frozenset({"GET"})))
+    # Longest prefix wins: /login only reads SQLite, so it is safe to resend
+    session.mount(f"{BACKEND_URL}/login", adapter(frozenset({"GET", "POST"})))
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    One session per Streamlit process: modules survive reruns, so every
+    browser session reuses the same connection pool.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def post(path: str, payload: Dict[str, Any], timeout=CHAT_TIMEOUT) -> requests.Response:
+    return get_session().post(f"{BACKEND_URL}{path}", json=payload, timeout=timeout)
+
+
+# -------------------------------
+# Message blocks
+# -------------------------------
+def parse_message(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A message ready to render: markdown line plus the image URLs in it.
+    """
+    content = msg["content"]
+    images = []
+    if msg["role"] == "viewer_agent" and "http" in content:
+        images = [f"{url}{'&' if '?' in url else '?'}size=thumb" for url in IMAGE_PROXY_URL.findall(content)]
+        images += IMAGE_FILE_URL.findall(content)
+    label = "🧑 **You:**" if msg["role"] == "user" else "🤖 **Bot:**"
+    return {"markdown": f"{label} {content}", "images": images}
+
+
+def parse_new(messages: List[Dict[str, Any]], blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Bring `blocks` up to date with the (append-only) transcript, parsing only
+    messages it doesn't cover yet.
+    """
+    if len(blocks) > len(messages):
+        blocks.clear()  # Transcript was reset
+    blocks.extend(parse_message(m) for m in messages[len(blocks):])
+    return blocks
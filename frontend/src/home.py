@@ -1,7 +1,7 @@
 import streamlit as st
 import requests
 from bot import show_bot_page
-API_URL = "http://127.0.0.1:8000/login"
+from client import LOGIN_TIMEOUT, post
 
 def show_login():
     st.title("👤 Fashion AI Login")
@@ -12,10 +12,10 @@ def show_login():
     if st.button("Login"):
         if username_or_email and password:
             try:
-                resp = requests.post(API_URL, json={
+                resp = post("/login", {
                     "username_or_email": username_or_email,
                     "password": password
-                })
+                }, timeout=LOGIN_TIMEOUT)
                 if resp.status_code == 200:
                     data = resp.json()
                     if data["success"]: